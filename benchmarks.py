@@ -0,0 +1,314 @@
+#!/usr/bin/python3
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import time
+import timeit
+from logic import Map, Game, Player, Move, Explose, ExplosionBlock, \
+    MapChanges, CELL_SIZE, CORNER_SIZE
+from point import Point, Direction
+from child_classes import UnbreakableBlock, SimpleMonster, \
+    LONG_RANGE_EXPLOSION_RADIUS
+from sim import IdleController
+
+MAP_SIZES = (15, 50, 150, 500)
+DENSITIES = (0.1, 0.5)
+QUERY_COUNT = 2000
+REPEAT = 3
+
+
+class LegacyPoint:
+
+    def __init__(self, x: int, y: int):
+        self._x = x
+        self._y = y
+
+    @property
+    def x(self) -> int:
+        return self._x
+
+    @property
+    def y(self) -> int:
+        return self._y
+
+    def __add__(self, other_point):
+        return LegacyPoint(self.x + other_point.x, self.y + other_point.y)
+
+    def __mul__(self, coefficient: int):
+        return LegacyPoint(self.x * coefficient, self.y * coefficient)
+
+    def __eq__(self, o: object) -> bool:
+        return type(o) is LegacyPoint and self.x == o.x and self.y == o.y
+
+    def __hash__(self) -> int:
+        return hash(self.x)*31 + hash(self.y)
+
+    def __sub__(self, other):
+        return self + (other * (-1))
+
+
+def point_benchmarks(point_type):
+    first = point_type(16, 32)
+    second = point_type(1, 0)
+    cells = {point_type(x * 16, y * 16): None
+             for x in range(15) for y in range(15)}
+    return {
+        "create": lambda: point_type(16, 32),
+        "add": lambda: first + second,
+        "sub": lambda: first - second,
+        "attributes": lambda: first.x + first.y,
+        "hash": lambda: hash(first),
+        "dict_lookup": lambda: first in cells,
+    }
+
+
+def run_point_benchmarks(number=200000):
+    results = {}
+    for name, point_type in (("legacy", LegacyPoint), ("point", Point)):
+        for case, function in point_benchmarks(point_type).items():
+            seconds = min(timeit.repeat(function, number=number, repeat=3))
+            results.setdefault(case, {})[name] = seconds / number * 10 ** 9
+    results["intern"] = {"point": min(timeit.repeat(
+        lambda: Point.intern(16, 32), number=number, repeat=3
+    )) / number * 10 ** 9}
+    return results
+
+
+def print_point_results(results):
+    print("{:<12} {:>12} {:>12} {:>8}".format("case", "legacy, ns",
+                                              "point, ns", "speedup"))
+    for case, timings in results.items():
+        legacy = timings.get("legacy")
+        print("{:<12} {:>12} {:>12.1f} {:>8}".format(
+            case,
+            "-" if legacy is None else "{:.1f}".format(legacy),
+            timings["point"],
+            "-" if legacy is None else
+            "{:.2f}x".format(legacy / timings["point"])
+        ))
+
+
+def create_map(size, density, seed=0):
+    generator = random.Random(seed)
+    game_map = Map()
+    for x in range(size):
+        for y in range(size):
+            value = generator.random()
+            if value < density:
+                game_map.add_map_object(UnbreakableBlock(),
+                                        Point(x * CELL_SIZE, y * CELL_SIZE))
+            elif value < density * 1.25:
+                game_map.add_map_object(SimpleMonster(),
+                                        Point(x * CELL_SIZE, y * CELL_SIZE))
+    return game_map
+
+
+def clear_cells(game_map, points):
+    for point in points:
+        for game_object in list(game_map.get_map_objects(point)):
+            game_map.remove_map_object(game_object, point)
+
+
+def measure(function, arguments):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for argument in arguments:
+            function(argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(arguments) * 10 ** 9
+
+
+def measure_reset(function, reset, count):
+    best = None
+    for _ in range(REPEAT):
+        elapsed = 0
+        for _ in range(count):
+            reset()
+            start = time.perf_counter()
+            function()
+            elapsed += time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / count * 10 ** 9
+
+
+def get_query_points(size, seed=1):
+    generator = random.Random(seed)
+    limit = size * CELL_SIZE
+    points = []
+    for i in range(QUERY_COUNT):
+        point = Point(generator.randrange(limit), generator.randrange(limit))
+        if i % 2 == 0:
+            point = Map.round_point(point, CELL_SIZE)
+        points.append(point)
+    return points
+
+
+def benchmark_add_map_object(size, density):
+    game_map = create_map(size, density)
+    objects = list(game_map.enumerate_all_objects())
+
+    def fill(_):
+        new_map = Map()
+        for point, game_object in objects:
+            new_map.add_map_object(game_object, point)
+
+    return measure(fill, [None]) / max(len(objects), 1)
+
+
+def benchmark_get_collisions(size, density):
+    game_map = create_map(size, density)
+    return measure(game_map.get_collisions, get_query_points(size))
+
+
+def benchmark_round_point(size, density):
+    return measure(lambda point: Map.round_point(point, CELL_SIZE),
+                   get_query_points(size))
+
+
+def benchmark_monster_count(size, density):
+    game = Game(create_map(size, density), Player(IdleController()))
+    return measure(lambda _: game.monster_count, [None] * 10)
+
+
+def benchmark_explose(size, density):
+    game_map = create_map(size, density)
+    center = Point(size // 2 * CELL_SIZE, size // 2 * CELL_SIZE)
+    clear_cells(game_map, (center,))
+    return measure(lambda _: Explose(
+        ExplosionBlock, center, LONG_RANGE_EXPLOSION_RADIUS
+    ).change_game_state(None, center, game_map, MapChanges()), [None] * 200)
+
+
+def create_move_setup(size, density):
+    game_map = create_map(size, density)
+    cell = size // 2 * CELL_SIZE
+    start = Point(cell, cell + CORNER_SIZE)
+    clear_cells(game_map, [Point(cell + dx * CELL_SIZE, cell + dy * CELL_SIZE)
+                           for dx in (-1, 0, 1, 2) for dy in (-1, 0, 1, 2)])
+    player = Player(IdleController())
+    game_map.add_map_object(player, start)
+    return game_map, player, start
+
+
+def measure_move(game_map, player, start):
+    move = Move(Direction.Right)
+
+    def reset():
+        game_map.remove_map_object(player, start)
+        game_map.add_map_object(player, start)
+
+    return measure_reset(lambda: move.change_game_state(
+        player, start, game_map, MapChanges()
+    ), reset, 500)
+
+
+def benchmark_move(size, density):
+    return measure_move(*create_move_setup(size, density))
+
+
+def benchmark_move_corner_slide(size, density):
+    game_map, player, start = create_move_setup(size, density)
+    cell = start.x
+    game_map.add_map_object(UnbreakableBlock(),
+                            Point(cell + CELL_SIZE, cell + CELL_SIZE))
+    changes = MapChanges()
+    Move(Direction.Right).change_game_state(player, start, game_map, changes)
+    assert changes.added[0][1] != start + Direction.Right.value
+    return measure_move(game_map, player, start)
+
+
+MAP_BENCHMARKS = {
+    "Map.add_map_object": benchmark_add_map_object,
+    "Map.get_collisions": benchmark_get_collisions,
+    "Map.round_point": benchmark_round_point,
+    "Game.monster_count": benchmark_monster_count,
+    "Explose.change_game_state": benchmark_explose,
+    "Move.change_game_state": benchmark_move,
+    "Move.change_game_state[corner_slide]": benchmark_move_corner_slide,
+}
+
+
+def run_map_benchmarks(sizes, densities, names=None):
+    results = []
+    for name, benchmark in MAP_BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        for size in sizes:
+            for density in densities:
+                results.append({
+                    "benchmark": name,
+                    "size": size,
+                    "density": density,
+                    "ns_per_op": benchmark(size, density)
+                })
+                print("{:<38} {:>4}x{:<4} {:>5} {:>14.1f} ns".format(
+                    name, size, size, density, results[-1]["ns_per_op"]))
+    return results
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_result_key(result):
+    return result["benchmark"], result["size"], result["density"]
+
+
+def compare_results(old_report, new_report):
+    old_results = {get_result_key(result): result
+                   for result in old_report["results"]}
+    print("{:<38} {:>9} {:>5} {:>12} {:>12} {:>8}".format(
+        "benchmark", "size", "dens", "old, ns", "new, ns", "ratio"))
+    for result in new_report["results"]:
+        old_result = old_results.get(get_result_key(result))
+        if old_result is None:
+            continue
+        print("{:<38} {:>4}x{:<4} {:>5} {:>12.1f} {:>12.1f} {:>7.2f}x".format(
+            result["benchmark"], result["size"], result["size"],
+            result["density"], old_result["ns_per_op"], result["ns_per_op"],
+            old_result["ns_per_op"] / result["ns_per_op"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks")
+    parser.add_argument("suite", nargs="?", choices=("map", "point"),
+                        default="map")
+    parser.add_argument("--sizes", type=int, nargs="+", default=MAP_SIZES)
+    parser.add_argument("--densities", type=float, nargs="+",
+                        default=DENSITIES)
+    parser.add_argument("--benchmarks", nargs="+",
+                        choices=list(MAP_BENCHMARKS))
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    args = parser.parse_args()
+
+    if args.suite == "point":
+        print_point_results(run_point_benchmarks())
+        return
+    report = {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "results": run_map_benchmarks(args.sizes, args.densities,
+                                      args.benchmarks)
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare_results(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 
 from logic import *
 import random
-from queue import Queue
+from collections import deque
 
 
 LONG_RANGE_EXPLOSION_RADIUS = 5
@@ -10,41 +10,150 @@ LONG_RANGE_EXPLOSION_RADIUS = 5
 
 class SimpleMonster(Monster):
 
+    __slots__ = ("direction",)
+
+    obstacle_mask = BLOCK | BOMB | BONUS
+
     def __init__(self):
         super().__init__()
-        self.object_types = [Block, Bomb, Bonus]
         self.direction = None
 
+    @property
+    def object_types(self) -> tuple:
+        return get_category_types(self.obstacle_mask)
+
     def move(self, coordinates: 'Point', old_map: 'Map'):
         if self.direction and self._can_move(old_map,
                                              coordinates +
                                              self.direction.value):
-            return Move(self.direction)
+            return Move.get(self.direction)
         directions = [Direction.Up, Direction.Down,
                       Direction.Left, Direction.Right]
         random.shuffle(directions)
         for direction in directions:
             if self._can_move(old_map, coordinates + direction.value):
                 self.direction = direction
-                return Move(direction)
+                return Move.get(direction)
         self.direction = None
-        return Move(Direction.Stand)
+        return Move.get(Direction.Stand)
 
     def can_move(self, collisions, old_collisions):
         return self._correct_collisions_to_move(collisions)
 
+    def get_blocking_mask(self, coordinates, old_map):
+        return self.obstacle_mask
+
     def _can_move(self, game_map, location):
-        collisions = game_map.get_collisions(location)
-        return self._correct_collisions_to_move(collisions)
+        return game_map.get_passability(self.obstacle_mask) \
+            .is_passable(location)
 
     def _correct_collisions_to_move(self, collisions):
-        return all(not isinstance(collision, type_)
-                   for collision in collisions
-                   for type_ in self.object_types)
+        return not get_category_mask(collisions) & self.obstacle_mask
+
+
+class FlowField:
+
+    DIRECTIONS = (Direction.Down, Direction.Up,
+                  Direction.Left, Direction.Right)
+
+    def __init__(self, game_map, vision_range, obstacle_mask, player_cells):
+        self._vision_distance = (vision_range - 1) * CELL_SIZE
+        self._obstacle_mask = obstacle_mask
+        self._player_cells = player_cells
+        self._distances = {}
+        self._fill(game_map)
+
+    @staticmethod
+    def get_flow_field(game_map, vision_range, obstacle_mask):
+        player_cells = tuple(
+            FlowField.get_touched_cells(point)
+            for point, _ in game_map.enumerate_objects("players")
+        )
+        return game_map.get_layout_cached(
+            (FlowField, vision_range, obstacle_mask),
+            get_category_types(obstacle_mask),
+            lambda: FlowField(game_map, vision_range, obstacle_mask,
+                              player_cells),
+            player_cells
+        )
+
+    @property
+    def player_position(self):
+        return self._player_cells[0][0] if self._player_cells else None
+
+    def get_distance(self, cell):
+        return self._distances.get(cell)
+
+    def get_next_point(self, cell):
+        if not self._in_vision_range(cell):
+            return None
+        next_point = None
+        next_distance = None
+        for direction in self.DIRECTIONS:
+            neighbour = Point.intern(cell.x + direction.value.x * CELL_SIZE,
+                                     cell.y + direction.value.y * CELL_SIZE)
+            distance = self._distances.get(neighbour)
+            if distance is not None and \
+                    (next_distance is None or distance < next_distance):
+                next_point = neighbour
+                next_distance = distance
+        return next_point
+
+    def _fill(self, game_map):
+        queue = deque()
+        for cells in self._player_cells:
+            for cell in cells:
+                if cell not in self._distances and \
+                        self._is_passable(game_map, cell):
+                    self._distances[cell] = 0
+                    queue.append(cell)
+        while queue:
+            node = queue.popleft()
+            distance = self._distances[node] + 1
+            for direction in self.DIRECTIONS:
+                new_node = Point.intern(
+                    node.x + direction.value.x * CELL_SIZE,
+                    node.y + direction.value.y * CELL_SIZE
+                )
+                if new_node not in self._distances and \
+                        self._in_vision_range(new_node) and \
+                        self._is_passable(game_map, new_node):
+                    self._distances[new_node] = distance
+                    queue.append(new_node)
+
+    @staticmethod
+    def get_touched_cells(point):
+        low_point = Point.intern(point.x - point.x % CELL_SIZE,
+                                 point.y - point.y % CELL_SIZE)
+        cells = [low_point]
+        if point.x != low_point.x:
+            cells.append(Point.intern(low_point.x + CELL_SIZE, low_point.y))
+        if point.y != low_point.y:
+            cells.append(Point.intern(low_point.x, low_point.y + CELL_SIZE))
+        if point.x != low_point.x and point.y != low_point.y:
+            cells.append(Point.intern(low_point.x + CELL_SIZE,
+                                      low_point.y + CELL_SIZE))
+        return tuple(cells)
+
+    def _in_vision_range(self, cell):
+        for cells in self._player_cells:
+            low_cell = cells[0]
+            high_cell = cells[-1]
+            if low_cell.x - self._vision_distance <= cell.x <= \
+                    high_cell.x + self._vision_distance and \
+                    low_cell.y - self._vision_distance <= cell.y <= \
+                    high_cell.y + self._vision_distance:
+                return True
+        return False
+
+    def _is_passable(self, game_map, cell):
+        return not game_map.get_collision_mask(cell) & self._obstacle_mask
 
 
 class CleverMonster(SimpleMonster):
 
+    __slots__ = ("_next_point", "_player_position")
+
     VISION_RANGE = 10
 
     def __init__(self):
@@ -52,133 +161,121 @@ class CleverMonster(SimpleMonster):
         self._next_point = None
         self._player_position = None
 
-    def in_vision_range(self, my_coordinates, object_coordinates):
-        return abs(my_coordinates.x - object_coordinates.x) < \
-               self.VISION_RANGE * CELL_SIZE and \
-               abs(my_coordinates.y - object_coordinates.y) < \
-               self.VISION_RANGE * CELL_SIZE
+    def get_flow_field(self, old_map: 'Map'):
+        return old_map.get_cached(
+            (FlowField, self.VISION_RANGE, self.obstacle_mask),
+            lambda: FlowField.get_flow_field(old_map, self.VISION_RANGE,
+                                             self.obstacle_mask)
+        )
 
     def move(self, coordinates: 'Point', old_map: 'Map'):
         if self._next_point is not None and self._next_point != coordinates:
             return self._switch_action(self._next_point - coordinates)
-        visited = set()
-        rounded_coordinates = Map.round_point(coordinates, CELL_SIZE)
-        queue = Queue()
-        queue.put(rounded_coordinates)
-        track = {}
-        player_position = None
-        while not queue.empty():
-            if player_position is not None:
-                break
-            node = queue.get()
-            for direction in (Direction.Down, Direction.Up,
-                              Direction.Left, Direction.Right):
-                new_node = node + (direction.value * CELL_SIZE)
-                collisions = old_map.get_collisions(new_node)
-
-                if new_node not in visited and \
-                        self.in_vision_range(coordinates, new_node) and \
-                        self._correct_collisions_to_move(collisions):
-
-                    visited.add(new_node)
-                    queue.put(new_node)
-                    track[new_node] = node
-
-                    if any(isinstance(collision, Player)
-                           for collision in collisions):
-                        player_position = new_node
-                        break
-        if player_position is None:
+        flow_field = self.get_flow_field(old_map)
+        next_point = flow_field.get_next_point(
+            Map.round_point(coordinates, CELL_SIZE)
+        )
+        if next_point is None:
             self._next_point = None
-            return Move(Direction.Stand)
-        else:
-            next_point = player_position
-            points = []
-            while track[next_point] != rounded_coordinates:
-                next_point = track[next_point]
-                points.append(next_point)
-
-            direction = next_point - coordinates
-            self._next_point = next_point
-            self._player_position = player_position
-            return self._switch_action(direction)
+            return Move.get(Direction.Stand)
+        self._next_point = next_point
+        self._player_position = flow_field.player_position
+        return self._switch_action(next_point - coordinates)
 
     def _switch_action(self, direction):
         if direction.x > 0:
-            return Move(Direction.Right)
+            return Move.get(Direction.Right)
         elif direction.x < 0:
-            return Move(Direction.Left)
+            return Move.get(Direction.Left)
         elif direction.y > 0:
-            return Move(Direction.Up)
+            return Move.get(Direction.Up)
         elif direction.y < 0:
-            return Move(Direction.Down)
+            return Move.get(Direction.Down)
         else:
-            return Move(Direction.Stand)
+            return Move.get(Direction.Stand)
 
 
 class StrongMonster(SimpleMonster):
 
+    __slots__ = ()
+
     def solve_collision(self, other_objects):
-        if any(isinstance(object_, HighPoweredExplosion)
-               for object_ in other_objects):
+        if get_category_mask(other_objects) & HIGH_POWERED_EXPLOSION:
             self._is_dead = True
 
 
 class UnbreakableBlock(Block):
-    pass
+
+    __slots__ = ()
 
 
 class FortifiedBlock(Block):
 
+    __slots__ = ()
+
     def solve_collision(self, other_objects):
-        if any(isinstance(object_, HighPoweredExplosion)
-               for object_ in other_objects):
+        if get_category_mask(other_objects) & HIGH_POWERED_EXPLOSION:
             self._is_dead = True
 
 
 class DestroyableBlock(Block):
 
+    __slots__ = ()
+
     def solve_collision(self, other_objects):
-        if any(isinstance(object_, ExplosionBlock)
-               for object_ in other_objects):
+        if get_category_mask(other_objects) & EXPLOSION:
             self._is_dead = True
 
 
 class SimpleBomb(Bomb):
-    pass
+
+    __slots__ = ()
 
 
 class HighPowerBomb(Bomb):
 
+    __slots__ = ()
+
     def __init__(self, tick_delay, explosion_radius):
         super().__init__(tick_delay, explosion_radius)
         self._explosion_type = HighPoweredExplosion
 
 
 class HighPoweredExplosion(ExplosionBlock):
-    pass
+
+    __slots__ = ()
+
+    category = HIGH_POWERED_EXPLOSION
 
 
 class HighBombBonus(Bonus):
 
+    __slots__ = ()
+
     def add_bonus(self, player):
         player.set_bomb_type(HighPowerBomb)
 
 
 class LongExplosionBonus(Bonus):
 
+    __slots__ = ()
+
     def add_bonus(self, player):
         player.add_buff(LongRangeExplosionBuff())
 
 
 class ImmuneBonus(Bonus):
 
+    __slots__ = ()
+
     def add_bonus(self, player):
         player.add_buff(ImmuneBuff())
 
 
 class ImmuneBuff(Buff):
 
+    __slots__ = ()
+
     def start(self, player):
         player.immune = True
 
@@ -188,6 +285,8 @@ class ImmuneBuff(Buff):
 
 class LongRangeExplosionBuff(Buff):
 
+    __slots__ = ()
+
     def start(self, player):
         player.set_bomb_radius(LONG_RANGE_EXPLOSION_RADIUS)
 
@@ -0,0 +1,539 @@
+#!/usr/bin/python3
+
+import random
+import numpy as np
+from logic import Map, Player, Block, Bomb, Bonus, Monster, ExplosionBlock, \
+    Move, PutBomb, FrameBuffer, TimerWheel, OBJECT_CATEGORIES, CELL_SIZE, \
+    CORNER_SIZE, EXPLOSION_LIVE, PLAYER, MONSTER, BLOCK, BOMB, EXPLOSION, \
+    BONUS, HIGH_POWERED_EXPLOSION, EXPLOSION_STOP_MASK
+from child_classes import UnbreakableBlock, DestroyableBlock, \
+    FortifiedBlock, ImmuneBonus, LongExplosionBonus, HighBombBonus, \
+    SimpleBomb, HighPowerBomb, HighPoweredExplosion, SimpleMonster, \
+    StrongMonster, CleverMonster, FlowField
+from point import Direction, Point
+
+KINDS = (Block, UnbreakableBlock, DestroyableBlock, FortifiedBlock,
+         Bonus, ImmuneBonus, LongExplosionBonus, HighBombBonus,
+         Bomb, SimpleBomb, HighPowerBomb,
+         ExplosionBlock, HighPoweredExplosion,
+         Monster, SimpleMonster, StrongMonster, CleverMonster, Player)
+KILLING_CATEGORIES = {
+    DestroyableBlock: EXPLOSION,
+    FortifiedBlock: HIGH_POWERED_EXPLOSION,
+    Monster: EXPLOSION,
+    SimpleMonster: EXPLOSION,
+    StrongMonster: HIGH_POWERED_EXPLOSION,
+    CleverMonster: EXPLOSION
+}
+WANDERERS = (SimpleMonster, StrongMonster)
+ACTORS = (CleverMonster, Player)
+FREE_MOVERS = (Monster, SimpleMonster, StrongMonster, CleverMonster, Player)
+
+EXPLOSION_KIND = KINDS.index(ExplosionBlock)
+PLAYER_KIND = KINDS.index(Player)
+CATEGORIES = np.array([kind.category for kind in KINDS], np.int64)
+KILLED_BY = np.array([KILLING_CATEGORIES.get(kind, 0) for kind in KINDS],
+                     np.int64)
+IS_WANDERER = np.array([kind in WANDERERS for kind in KINDS])
+IS_ACTOR = np.array([kind in ACTORS for kind in KINDS])
+IS_EXPLOSION = CATEGORIES & EXPLOSION != 0
+RAY_KINDS = np.array([KINDS.index(HighPoweredExplosion)
+                      if kind is HighPowerBomb else EXPLOSION_KIND
+                      for kind in KINDS], np.int16)
+
+DIRECTION_CODES = {direction: code for code, direction
+                   in enumerate(FrameBuffer.DIRECTIONS)}
+SHIFT_X = np.array([direction.value.x for direction in FrameBuffer.DIRECTIONS])
+SHIFT_Y = np.array([direction.value.y for direction in FrameBuffer.DIRECTIONS])
+RAY_DIRECTIONS = tuple(DIRECTION_CODES[direction] for direction in (
+    Direction.Right, Direction.Left, Direction.Up, Direction.Down))
+WANDER_DIRECTIONS = tuple(DIRECTION_CODES[direction] for direction in (
+    Direction.Up, Direction.Down, Direction.Left, Direction.Right))
+NO_DIRECTION = -1
+
+
+class UnsupportedObjectException(Exception):
+    pass
+
+
+class EcsGame:
+
+    COLUMNS = (("_kind", np.int16), ("_x", np.int64), ("_y", np.int64),
+               ("_timer", np.int64), ("_delay", np.int64),
+               ("_radius", np.int64), ("_direction", np.int8),
+               ("_alive", np.bool_), ("_object", object),
+               ("_target", object))
+
+    def __init__(self, game_map, capacity=64):
+        self.timers = TimerWheel()
+        self.events = None
+        self._size = 0
+        self._dead_count = 0
+        self._frame_rows = None
+        self._player = None
+        self._last_bomb = None
+        for name, dtype in self.COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype))
+        for point, game_object in game_map.enumerate_all_objects():
+            self._add_object(game_object, point)
+
+    @property
+    def now(self) -> int:
+        return self.timers.now
+
+    @property
+    def player(self) -> 'Player':
+        return self._player
+
+    @property
+    def stats(self) -> dict:
+        counts = np.bincount(self._kind[:self._size][self._alive[:self._size]],
+                             minlength=len(KINDS))
+        return {category: int(sum(count for kind, count in zip(KINDS, counts)
+                                  if issubclass(kind, type_)))
+                for category, type_ in OBJECT_CATEGORIES.items()}
+
+    @property
+    def monster_count(self) -> int:
+        return self.stats["monsters"]
+
+    def enumerate_objects(self):
+        size = self._size
+        for index in np.flatnonzero(self._alive[:size]):
+            yield KINDS[self._kind[index]], \
+                Point(int(self._x[index]), int(self._y[index]))
+
+    def make_turn(self):
+        self._turn(False)
+
+    def make_frame(self, frame=None) -> 'FrameBuffer':
+        if frame is None:
+            frame = FrameBuffer()
+        self._turn(True)
+        codes, xs, ys, directions, states = self._frame_rows
+        frame.clear()
+        unique_codes, inverse = np.unique(codes, return_inverse=True)
+        kind_ids = np.array([frame.get_kind_id(self._get_frame_kind(code))
+                             for code in unique_codes.tolist()], np.uint16)
+        frame.kind_ids.frombytes(kind_ids[inverse].tobytes())
+        frame.xs.frombytes(xs.astype(np.int32).tobytes())
+        frame.ys.frombytes(ys.astype(np.int32).tobytes())
+        frame.directions.frombytes(directions.astype(np.uint8).tobytes())
+        frame.states.frombytes(states.astype(np.int32).tobytes())
+        return frame
+
+    def _add_object(self, game_object, point):
+        if type(game_object) not in KINDS:
+            raise UnsupportedObjectException(
+                "{} is not supported".format(type(game_object).__name__))
+        if not isinstance(game_object, FREE_MOVERS) and \
+                (point.x % CELL_SIZE or point.y % CELL_SIZE):
+            raise UnsupportedObjectException(
+                "{} is not aligned to the grid".format(
+                    type(game_object).__name__))
+        if isinstance(game_object, Player):
+            if self._player is not None:
+                raise UnsupportedObjectException(
+                    "Only one player is supported")
+            self._player = game_object
+        timer = -1
+        delay = 0
+        radius = 0
+        direction = DIRECTION_CODES[Direction.Stand]
+        if isinstance(game_object, Bomb):
+            delay = game_object.tick_delay
+            radius = game_object.explosion_radius
+        elif isinstance(game_object, ExplosionBlock):
+            delay = game_object.life_time
+            direction = DIRECTION_CODES[game_object.direction]
+        elif type(game_object) in WANDERERS:
+            direction = NO_DIRECTION if game_object.direction is None \
+                else DIRECTION_CODES[game_object.direction]
+        self._append(np.array([KINDS.index(type(game_object))]),
+                     np.array([point.x]), np.array([point.y]),
+                     np.array([timer]), np.array([delay]),
+                     np.array([radius]), np.array([direction]),
+                     game_object)
+
+    def _append(self, kinds, xs, ys, timers, delays, radii, directions,
+                game_object=None):
+        count = len(kinds)
+        start = self._size
+        if start + count > len(self._kind):
+            self._reserve(max(2 * len(self._kind), start + count))
+        end = start + count
+        self._kind[start:end] = kinds
+        self._x[start:end] = xs
+        self._y[start:end] = ys
+        self._timer[start:end] = timers
+        self._delay[start:end] = delays
+        self._radius[start:end] = radii
+        self._direction[start:end] = directions
+        self._alive[start:end] = True
+        self._object[start:end] = game_object
+        self._target[start:end] = None
+        self._size = end
+
+    def _reserve(self, capacity):
+        for name, dtype in self.COLUMNS:
+            column = np.zeros(capacity, dtype)
+            column[:self._size] = getattr(self, name)[:self._size]
+            setattr(self, name, column)
+
+    def _compact(self):
+        alive = self._alive[:self._size].copy()
+        count = int(alive.sum())
+        for name, _ in self.COLUMNS:
+            column = getattr(self, name)
+            column[:count] = column[:self._size][alive]
+        self._size = count
+        self._dead_count = 0
+
+    def _turn(self, record_frame):
+        self.timers.advance()
+        now = self.timers.now
+        if self._dead_count * 2 > self._size:
+            self._compact()
+        size = self._size
+        alive = self._alive[:size]
+        kind = self._kind[:size]
+        x = self._x[:size]
+        y = self._y[:size]
+        timer = self._timer[:size]
+        category = CATEGORIES[kind]
+
+        timed = alive & (category & (BOMB | EXPLOSION) != 0)
+        starting = timed & (timer < 0)
+        timer[starting] = now + self._delay[:size][starting] - 1
+        expired = timed & (timer <= now)
+
+        grid = _Grid(x, y, int(self._radius[:size].max(initial=0)) + 1)
+        cells = grid.get_cells(x, y)
+        blocked = grid.mark(
+            cells[alive & (category & EXPLOSION_STOP_MASK != 0)])
+        triggers = grid.mark(cells[alive & (kind == EXPLOSION_KIND)])
+        exploding = alive & (category & BOMB != 0) & \
+            (expired | triggers[cells])
+
+        moves = self._wander(alive, kind, x, y, grid, blocked)
+        placed = self._act(alive, kind, x, y, grid, cells, moves)
+        rays = self._cast_rays(np.flatnonzero(exploding), grid, blocked)
+
+        if record_frame:
+            self._record_frame(alive & ~exploding, moves, rays, placed)
+
+        x += SHIFT_X[moves]
+        y += SHIFT_Y[moves]
+        alive[exploding] = False
+        centers = np.flatnonzero(exploding)
+        self._append(
+            np.concatenate((np.full(len(centers), EXPLOSION_KIND), rays[0])),
+            np.concatenate((x[centers], rays[1])),
+            np.concatenate((y[centers], rays[2])),
+            now + EXPLOSION_LIVE - 1, EXPLOSION_LIVE, 0,
+            np.concatenate((np.zeros(len(centers), np.int8), rays[3])))
+        for bomb, point in placed:
+            self._add_object(bomb, Map.round_point(point, CELL_SIZE))
+        self._solve_collisions(now)
+
+    def _wander(self, alive, kind, x, y, grid, blocked):
+        moves = np.zeros(len(kind), np.int8)
+        wanderers = np.flatnonzero(alive & IS_WANDERER[kind])
+        if not len(wanderers):
+            return moves
+        passable = np.zeros((len(wanderers), len(FrameBuffer.DIRECTIONS)),
+                            bool)
+        for code in WANDER_DIRECTIONS:
+            passable[:, code] = ~grid.collect(
+                blocked, x[wanderers] + SHIFT_X[code],
+                y[wanderers] + SHIFT_Y[code])
+        directions = self._direction[wanderers].astype(np.int64)
+        keeps = (directions != NO_DIRECTION) & \
+            passable[np.arange(len(wanderers)), np.maximum(directions, 0)]
+        chosen = np.where(keeps, directions, 0)
+        for i in np.flatnonzero(~keeps).tolist():
+            order = list(WANDER_DIRECTIONS)
+            random.shuffle(order)
+            for code in order:
+                if passable[i, code]:
+                    chosen[i] = code
+                    break
+        self._direction[wanderers] = np.where(chosen != 0, chosen,
+                                              NO_DIRECTION)
+        moves[wanderers] = chosen
+        return moves
+
+    def _act(self, alive, kind, x, y, grid, cells, moves):
+        placed = []
+        actors = np.flatnonzero(alive & IS_ACTOR[kind])
+        if not len(actors):
+            return placed
+        view = _MapView(self, alive, kind, x, y, grid)
+        for index in actors.tolist():
+            game_object = self._object[index]
+            point = Point(int(x[index]), int(y[index]))
+            if isinstance(game_object, Player):
+                action = game_object.move(point, view)
+            else:
+                action = Move.get(self._chase(index, point, view))
+            if isinstance(action, PutBomb):
+                if np.count_nonzero(_get_touching(
+                        alive, x, y, Map.round_point(point, CELL_SIZE))) == 1:
+                    game_object.set_last_bomb(action.bomb)
+                    self._last_bomb = action.bomb
+                    placed.append((action.bomb, point))
+            elif isinstance(action, Move):
+                blocked = self._get_blocked(game_object, point, alive, kind,
+                                            x, y, grid, cells)
+                moves[index] = DIRECTION_CODES[
+                    _slide(action.direction, point, grid, blocked)]
+            else:
+                raise UnsupportedObjectException(
+                    "{} is not supported".format(type(action).__name__))
+        return placed
+
+    def _chase(self, index, point, view):
+        target = self._target[index]
+        if target is None or target == point:
+            monster = self._object[index]
+            flow_field = view.get_flow_field(monster.VISION_RANGE,
+                                             monster.obstacle_mask)
+            target = flow_field.get_next_point(
+                Map.round_point(point, CELL_SIZE))
+            self._target[index] = target
+            if target is None:
+                return Direction.Stand
+        shift = target - point
+        if shift.x > 0:
+            return Direction.Right
+        if shift.x < 0:
+            return Direction.Left
+        if shift.y > 0:
+            return Direction.Up
+        if shift.y < 0:
+            return Direction.Down
+        return Direction.Stand
+
+    def _get_blocked(self, game_object, point, alive, kind, x, y, grid,
+                     cells):
+        category = CATEGORIES[kind]
+        if not isinstance(game_object, Player):
+            return grid.mark(
+                cells[alive & (category & game_object.obstacle_mask != 0)])
+        if game_object.ghost_mode:
+            return None
+        blockers = alive & (category & (BLOCK | BOMB) != 0)
+        for index in np.flatnonzero(
+                blockers & _get_touching(alive, x, y, point)).tolist():
+            if self._object[index] is self._last_bomb:
+                blockers[index] = False
+        return grid.mark(cells[blockers])
+
+    def _cast_rays(self, bombs, grid, blocked):
+        centers_x = self._x[bombs]
+        centers_y = self._y[bombs]
+        lengths = self._radius[bombs] - 1
+        ray_kinds = RAY_KINDS[self._kind[bombs]]
+        parts = []
+        for code in RAY_DIRECTIONS:
+            stopped = np.zeros(len(bombs), bool)
+            for step in range(1, int(lengths.max(initial=0)) + 1):
+                lit = ~stopped & (step <= lengths)
+                if not lit.any():
+                    break
+                ray_x = centers_x[lit] + step * SHIFT_X[code] * CELL_SIZE
+                ray_y = centers_y[lit] + step * SHIFT_Y[code] * CELL_SIZE
+                parts.append((ray_kinds[lit], ray_x, ray_y,
+                              np.full(len(ray_x), code, np.int8)))
+                stopped[lit] = blocked[grid.get_cells(ray_x, ray_y)]
+        if not parts:
+            return (np.zeros(0, np.int16), np.zeros(0, np.int64),
+                    np.zeros(0, np.int64), np.zeros(0, np.int8))
+        return tuple(np.concatenate(column) for column in zip(*parts))
+
+    def _solve_collisions(self, now):
+        size = self._size
+        alive = self._alive[:size]
+        kind = self._kind[:size]
+        x = self._x[:size]
+        y = self._y[:size]
+        category = CATEGORIES[kind]
+        explosions = alive & (category & EXPLOSION != 0)
+        grid = _Grid(x[alive], y[alive], 1)
+        damage = np.zeros(grid.size, np.int64)
+        cells = grid.get_cells(x[explosions], y[explosions])
+        damage[cells] = EXPLOSION
+        damage[cells[category[explosions] & HIGH_POWERED_EXPLOSION != 0]] |= \
+            HIGH_POWERED_EXPLOSION
+        vulnerable = np.flatnonzero(alive & (KILLED_BY[kind] != 0))
+        hits = grid.collect(damage, x[vulnerable], y[vulnerable])
+        dead = np.zeros(size, bool)
+        dead[vulnerable] = hits & KILLED_BY[kind[vulnerable]] != 0
+        dead |= explosions & (self._timer[:size] <= now)
+        for index in np.flatnonzero(alive & (kind == PLAYER_KIND)).tolist():
+            player = self._object[index]
+            touching = _get_touching(alive, x, y,
+                                     Point(int(x[index]), int(y[index])))
+            if not player.immune and \
+                    np.any(category[touching] & (MONSTER | EXPLOSION)):
+                player.is_dead = True
+                dead[index] = True
+            for bonus in np.flatnonzero(
+                    touching & (category & BONUS != 0)).tolist():
+                self._object[bonus].add_bonus(player)
+                dead[bonus] = True
+        alive[dead] = False
+        self._dead_count = size - int(np.count_nonzero(alive))
+
+    def _record_frame(self, shown, moves, rays, placed):
+        ray_kinds, rays_x, rays_y, ray_directions = rays
+        if placed:
+            ray_kinds = np.concatenate((ray_kinds, [
+                KINDS.index(type(bomb)) for bomb, _ in placed]))
+            rays_x = np.concatenate((rays_x, [point.x for _, point in placed]))
+            rays_y = np.concatenate((rays_y, [point.y for _, point in placed]))
+            ray_directions = np.concatenate((ray_directions,
+                                             np.zeros(len(placed), np.int8)))
+        size = len(shown)
+        kind = self._kind[:size]
+        life_times = np.maximum(self._timer[:size] - self.timers.now, 0)
+        codes = self._get_frame_codes(kind, self._direction[:size])
+        self._frame_rows = (
+            np.concatenate((codes[shown],
+                            self._get_frame_codes(ray_kinds, ray_directions))),
+            np.concatenate((self._x[:size][shown], rays_x)),
+            np.concatenate((self._y[:size][shown], rays_y)),
+            np.concatenate((moves[shown], np.zeros(len(ray_kinds), np.int8))),
+            np.concatenate((np.where(IS_EXPLOSION[kind], life_times, 0)[shown],
+                            np.where(IS_EXPLOSION[ray_kinds],
+                                     max(EXPLOSION_LIVE - 1, 0), 0)))
+        )
+
+    @staticmethod
+    def _get_frame_codes(kinds, directions):
+        return kinds.astype(np.int64) * len(FrameBuffer.DIRECTIONS) + \
+            np.where(IS_EXPLOSION[kinds], directions, 0)
+
+    def _get_frame_kind(self, code):
+        kind, direction = divmod(code, len(FrameBuffer.DIRECTIONS))
+        if IS_EXPLOSION[kind]:
+            return KINDS[kind], FrameBuffer.DIRECTIONS[direction]
+        return KINDS[kind]
+
+
+class _MapView:
+
+    def __init__(self, game, alive, kind, x, y, grid):
+        self.timers = game.timers
+        self.events = None
+        self._alive = alive
+        self._category = CATEGORIES[kind]
+        self._x = x
+        self._y = y
+        self._grid = grid
+        self._cell_masks = None
+        self._flow_fields = {}
+
+    def get_collision_mask(self, coordinates: 'Point') -> int:
+        if coordinates.x % CELL_SIZE or coordinates.y % CELL_SIZE:
+            touching = _get_touching(self._alive, self._x, self._y,
+                                     coordinates)
+            return int(np.bitwise_or.reduce(self._category[touching]))
+        if self._cell_masks is None:
+            self._cell_masks = np.zeros(self._grid.size, np.int64)
+            xs = self._x[self._alive]
+            ys = self._y[self._alive]
+            categories = self._category[self._alive]
+            for shift_x in (0, CELL_SIZE - 1):
+                for shift_y in (0, CELL_SIZE - 1):
+                    np.bitwise_or.at(
+                        self._cell_masks,
+                        self._grid.get_cells(xs + shift_x, ys + shift_y),
+                        categories)
+        return int(self._grid.get(self._cell_masks, coordinates))
+
+    def get_flow_field(self, vision_range, obstacle_mask) -> 'FlowField':
+        key = vision_range, obstacle_mask
+        if key not in self._flow_fields:
+            players = np.flatnonzero(self._alive &
+                                     (self._category & PLAYER != 0))
+            player_cells = tuple(
+                FlowField.get_touched_cells(Point(int(self._x[index]),
+                                                  int(self._y[index])))
+                for index in players.tolist())
+            self._flow_fields[key] = FlowField(self, vision_range,
+                                               obstacle_mask, player_cells)
+        return self._flow_fields[key]
+
+
+def _get_touching(alive, xs, ys, point):
+    return alive & (np.abs(xs - point.x) < CELL_SIZE) & \
+        (np.abs(ys - point.y) < CELL_SIZE)
+
+
+def _slide(direction, point, grid, blocked):
+    if blocked is None:
+        return direction
+    shift = direction.value
+    if not grid.touches(blocked, point + shift):
+        return direction
+    sides = (Direction.Up, Direction.Down) \
+        if direction in (Direction.Right, Direction.Left) \
+        else (Direction.Right, Direction.Left)
+    for side in sides:
+        for i in range(1, CORNER_SIZE + 1):
+            if not grid.touches(blocked, point.translate(
+                    i * side.value.x + shift.x, i * side.value.y + shift.y)):
+                return side
+    return Direction.Stand
+
+
+class _Grid:
+
+    def __init__(self, xs, ys, margin):
+        if len(xs):
+            self._left = int(xs.min()) // CELL_SIZE - margin
+            self._top = int(ys.min()) // CELL_SIZE - margin
+            right = (int(xs.max()) + CELL_SIZE - 1) // CELL_SIZE + margin
+            bottom = (int(ys.max()) + CELL_SIZE - 1) // CELL_SIZE + margin
+        else:
+            self._left = self._top = right = bottom = 0
+        self._width = right - self._left + 1
+        self._height = bottom - self._top + 1
+        self.size = self._width * self._height
+
+    def get_cells(self, xs, ys):
+        return (xs // CELL_SIZE - self._left) * self._height + \
+            ys // CELL_SIZE - self._top
+
+    def mark(self, cells):
+        grid = np.zeros(self.size, bool)
+        grid[cells] = True
+        return grid
+
+    def get(self, grid, point):
+        cell_x = point.x // CELL_SIZE - self._left
+        cell_y = point.y // CELL_SIZE - self._top
+        if 0 <= cell_x < self._width and 0 <= cell_y < self._height:
+            return grid[cell_x * self._height + cell_y]
+        return 0
+
+    def touches(self, grid, point):
+        low_x = point.x // CELL_SIZE - self._left
+        high_x = (point.x + CELL_SIZE - 1) // CELL_SIZE - self._left
+        low_y = point.y // CELL_SIZE - self._top
+        high_y = (point.y + CELL_SIZE - 1) // CELL_SIZE - self._top
+        height = self._height
+        return bool(grid[low_x * height + low_y] or
+                    grid[low_x * height + high_y] or
+                    grid[high_x * height + low_y] or
+                    grid[high_x * height + high_y])
+
+    def collect(self, grid, xs, ys):
+        low_x = xs // CELL_SIZE - self._left
+        high_x = (xs + CELL_SIZE - 1) // CELL_SIZE - self._left
+        low_y = ys // CELL_SIZE - self._top
+        high_y = (ys + CELL_SIZE - 1) // CELL_SIZE - self._top
+        height = self._height
+        return grid[low_x * height + low_y] | grid[low_x * height + high_y] | \
+            grid[high_x * height + low_y] | grid[high_x * height + high_y]
@@ -4,7 +4,7 @@ from PyQt5 import QtWidgets, QtGui, QtCore
 import sys
 import logic
 import os
-from level_creator import LevelCreator
+from level_creator import LevelCreator, DEFAULT_LEGEND
 from child_classes import *
 import copy
 from PyQt5.QtCore import Qt
@@ -66,22 +66,21 @@ class GameController(GameController):
 
 class PlayerController(PlayerController):
 
+    DIRECTIONS = (Direction.Down, Direction.Up, Direction.Left,
+                  Direction.Right)
+
     def __init__(self):
         self._key = None
         self._active_keys = [Qt.Key_W, Qt.Key_S, Qt.Key_A, Qt.Key_D,
                              Qt.Key_Space]
 
     def select_action(self):
-        actions = {
-            self._active_keys[0]: logic.Move(Direction.Down),
-            self._active_keys[1]: logic.Move(Direction.Up),
-            self._active_keys[2]: logic.Move(Direction.Left),
-            self._active_keys[3]: logic.Move(Direction.Right),
-            self._active_keys[4]: logic.PutBomb(self._player.get_bomb())
-        }
-        if self._key and self._key in actions:
-            return actions[self._key]
-        return logic.Move(Direction.Stand)
+        if self._key and self._key in self._active_keys:
+            index = self._active_keys.index(self._key)
+            if index < len(self.DIRECTIONS):
+                return logic.Move.get(self.DIRECTIONS[index])
+            return logic.PutBomb(bomb_factory=self._player.get_bomb)
+        return logic.Move.get(Direction.Stand)
 
     def set_active_keys(self, new_keys):
         if len(new_keys) != 5:
@@ -222,18 +221,6 @@ class BombermanWindow(QtWidgets.QWidget):
 
     def initialize_new_game(self, level):
 
-        legend = {
-            "#": lambda: (UnbreakableBlock(),),
-            "H": lambda: (DestroyableBlock(),),
-            "@": lambda: (SimpleMonster(),),
-            "h": lambda: (LongExplosionBonus(), DestroyableBlock()),
-            "I": lambda: (ImmuneBonus(), DestroyableBlock()),
-            "C": lambda: (CleverMonster(),),
-            "E": lambda: (HighBombBonus(), DestroyableBlock()),
-            "S": lambda: (StrongMonster(),),
-            "F": lambda: (FortifiedBlock(),)
-        }
-
         self.win_flag = False
 
         if level == "Random":
@@ -242,7 +229,7 @@ class BombermanWindow(QtWidgets.QWidget):
             level_width = RANDOM_LEVEL_SIZE
             level_height = RANDOM_LEVEL_SIZE
         else:
-            level_creator = LevelCreator(legend)
+            level_creator = LevelCreator(DEFAULT_LEGEND)
             with open(level) as f:
                 level_ = f.read().split('\n')
             game_map, level_width, level_height = \
@@ -251,7 +238,7 @@ class BombermanWindow(QtWidgets.QWidget):
         player = Player(self.player_controller)
         player.set_bomb_type(SimpleBomb)
         game_map.add_map_object(player, Point(CELL_SIZE, CELL_SIZE))
-        self.game = Game(game_map, player)
+        self.game = Game(game_map, player, incremental=True)
         return level_width, level_height
 
     def keyPressEvent(self, key_event):
@@ -347,6 +334,9 @@ class DeadAnimations:
 class StateSwitcher:
 
     class AnimationState:
+        __slots__ = ("state", "previous_state", "previous_direction",
+                     "is_final_animation")
+
         def __init__(self, state, previous_state, previous_direction,
                      is_final_animation=False):
             self.state = state
@@ -355,6 +345,8 @@ class StateSwitcher:
             self.is_final_animation = is_final_animation
 
     class State:
+        __slots__ = ("state", "previous_state", "previous_direction")
+
         def __init__(self):
             self.state = 0
             self.previous_state = 0
@@ -372,6 +364,8 @@ class StateSwitcher:
             )
 
     class ExplosionState:
+        __slots__ = ("state_counts", "is_final_animation")
+
         def __init__(self, state_count, is_final_animation):
             self.state_counts = state_count
             self.is_final_animation = is_final_animation
@@ -2,7 +2,22 @@
 
 from logic import Map, CELL_SIZE, Point
 import random
-from child_classes import DestroyableBlock, SimpleMonster, UnbreakableBlock
+from child_classes import DestroyableBlock, SimpleMonster, UnbreakableBlock, \
+    LongExplosionBonus, ImmuneBonus, CleverMonster, HighBombBonus, \
+    StrongMonster, FortifiedBlock
+
+
+DEFAULT_LEGEND = {
+    "#": lambda: (UnbreakableBlock(),),
+    "H": lambda: (DestroyableBlock(),),
+    "@": lambda: (SimpleMonster(),),
+    "h": lambda: (LongExplosionBonus(), DestroyableBlock()),
+    "I": lambda: (ImmuneBonus(), DestroyableBlock()),
+    "C": lambda: (CleverMonster(),),
+    "E": lambda: (HighBombBonus(), DestroyableBlock()),
+    "S": lambda: (StrongMonster(),),
+    "F": lambda: (FortifiedBlock(),)
+}
 
 
 class LevelCreator:
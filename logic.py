@@ -1,6 +1,8 @@
 #!/usr/bin/python3
 
 from point import Direction, Point
+from array import array
+from bisect import bisect_left, bisect_right, insort
 from collections import defaultdict
 
 
@@ -10,6 +12,28 @@ TIME_EXPLOSION_DELAY = 100
 START_EXPLOSION_RADIUS = 2
 CORNER_SIZE = 8
 BUFF_TIME = 1000
+TIMER_WHEEL_SIZE = 256
+
+PLAYER = 1
+MONSTER = 2
+BLOCK = 4
+BOMB = 8
+EXPLOSION = 16
+BONUS = 32
+HIGH_POWERED_EXPLOSION = 64
+EXPLOSION_STOP_MASK = BLOCK | BOMB | BONUS
+
+
+def get_category_mask(objects) -> int:
+    mask = 0
+    for game_object in objects:
+        mask |= game_object.category
+    return mask
+
+
+def get_category_types(mask: int) -> tuple:
+    return tuple(type_ for type_ in OBJECT_CATEGORIES.values()
+                 if type_.category & mask)
 
 
 class OutOfMapRangeException(Exception):
@@ -18,21 +42,260 @@ class OutOfMapRangeException(Exception):
 
 class Map:
 
+    _type_categories = {}
+
     def __init__(self):
-        self._objects = defaultdict(list)
-        self._sorted_points_by_x = []
-        self._sorted_points_by_y = []
+        self._objects = {}
+        self.pool = None
+        self._grid = defaultdict(set)
+        self._active_cells = defaultdict(int)
+        self._dormant_cells = defaultdict(int)
+        self._dormant_version = 0
+        self._dormant_columns = None
+        self._dormant_columns_version = None
+        self._dormant_animations = None
+        self._dormant_animations_version = None
+        self._version = 0
+        self._cache = {}
+        self._cache_version = 0
+        self._type_versions = defaultdict(int)
+        self._layout_cache = {}
+        self._counts = defaultdict(int)
+        self._masks = defaultdict(int)
+        self._timers = None
+        self.explosions = None
+        self.events = None
+        self._collision_cache = None
+        self._collision_cache_version = None
+        self.collision_stats = None
+        self._blocker_rows = {}
+        self._blocker_row_keys = []
+        self._blocker_columns = {}
+        self._blocker_column_keys = []
+        self._category_cells = defaultdict(lambda: defaultdict(int))
+        self._category_grids = defaultdict(lambda: defaultdict(set))
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def clear(self):
+        self._objects.clear()
+        for points in self._grid.values():
+            points.clear()
+        self._active_cells.clear()
+        self._dormant_cells.clear()
+        self._dormant_version += 1
+        self._dormant_animations = None
+        self._cache.clear()
+        self._type_versions.clear()
+        self._layout_cache.clear()
+        self._counts.clear()
+        self._masks.clear()
+        self._blocker_rows.clear()
+        self._blocker_row_keys.clear()
+        self._blocker_columns.clear()
+        self._blocker_column_keys.clear()
+        for category_cells in self._category_cells.values():
+            category_cells.clear()
+        for category_grid in self._category_grids.values():
+            for points in category_grid.values():
+                points.clear()
+        self._version += 1
+
+    @property
+    def timers(self) -> 'TimerWheel':
+        if self._timers is None:
+            self._timers = TimerWheel()
+        return self._timers
+
+    @timers.setter
+    def timers(self, timers: 'TimerWheel'):
+        self._timers = timers
 
     def add_map_object(self, map_object: 'MapObject', coordinates: 'Point'):
-        self._objects[coordinates].append(map_object)
-        self._sorted_points_by_x = None
-        self._sorted_points_by_y = None
+        cell_objects = self._objects.get(coordinates)
+        if cell_objects is None:
+            cell_objects = []
+            self._objects[coordinates] = cell_objects
+            for grid_cell in Map.get_grid_cells(coordinates):
+                self._grid[grid_cell].add(coordinates)
+        cell_objects.append(map_object)
+        self._masks[coordinates] |= map_object.category
+        if map_object.category & EXPLOSION_STOP_MASK:
+            Map._add_to_lines(self._blocker_rows, self._blocker_row_keys,
+                              coordinates.y, coordinates.x)
+            Map._add_to_lines(self._blocker_columns,
+                              self._blocker_column_keys,
+                              coordinates.x, coordinates.y)
+        activity_cells = self._get_activity_cells(map_object)
+        activity_cells[coordinates] += 1
+        if map_object.is_dormant:
+            self._dormant_version += 1
+        self._type_versions[type(map_object)] += 1
+        for category in Map.get_categories(type(map_object)):
+            self._counts[category] += 1
+            category_cells = self._category_cells[category]
+            category_cells[coordinates] += 1
+            if category_cells[coordinates] == 1:
+                category_grid = self._category_grids[category]
+                for grid_cell in Map.get_grid_cells(coordinates):
+                    category_grid[grid_cell].add(coordinates)
+        self._version += 1
+
+    def remove_map_object(self, map_object: 'MapObject',
+                          coordinates: 'Point'):
+        cell_objects = self._objects.get(coordinates, ())
+        for i, cell_object in enumerate(cell_objects):
+            if cell_object is map_object:
+                del cell_objects[i]
+                break
+        else:
+            raise ValueError("Object is not located at " + str(coordinates))
+        if map_object.category & EXPLOSION_STOP_MASK:
+            Map._remove_from_lines(self._blocker_rows,
+                                   self._blocker_row_keys,
+                                   coordinates.y, coordinates.x)
+            Map._remove_from_lines(self._blocker_columns,
+                                   self._blocker_column_keys,
+                                   coordinates.x, coordinates.y)
+        activity_cells = self._get_activity_cells(map_object)
+        activity_cells[coordinates] -= 1
+        if activity_cells[coordinates] == 0:
+            del activity_cells[coordinates]
+        if map_object.is_dormant:
+            self._dormant_version += 1
+        if cell_objects:
+            self._masks[coordinates] = get_category_mask(cell_objects)
+        else:
+            del self._objects[coordinates]
+            del self._masks[coordinates]
+            Map._discard_from_grid(self._grid, coordinates)
+        self._type_versions[type(map_object)] += 1
+        for category in Map.get_categories(type(map_object)):
+            self._counts[category] -= 1
+            category_cells = self._category_cells[category]
+            category_cells[coordinates] -= 1
+            if category_cells[coordinates] == 0:
+                del category_cells[coordinates]
+                Map._discard_from_grid(self._category_grids[category],
+                                       coordinates)
+        self._version += 1
+
+    @staticmethod
+    def _discard_from_grid(grid, coordinates):
+        for grid_cell in Map.get_grid_cells(coordinates):
+            points = grid[grid_cell]
+            points.discard(coordinates)
+            if not points:
+                del grid[grid_cell]
+
+    @staticmethod
+    def get_categories(type_) -> tuple:
+        categories = Map._type_categories.get(type_)
+        if categories is None:
+            categories = tuple(category for category, base_type
+                               in OBJECT_CATEGORIES.items()
+                               if issubclass(type_, base_type))
+            Map._type_categories[type_] = categories
+        return categories
+
+    @staticmethod
+    def get_category(type_):
+        for category, base_type in OBJECT_CATEGORIES.items():
+            if base_type is type_:
+                return category
+        return None
+
+    def enumerate_objects(self, category: str):
+        for point in self._category_cells[category].keys():
+            for game_object in self._objects[point]:
+                if category in Map.get_categories(type(game_object)):
+                    yield point, game_object
+
+    def has_collision(self, coordinates: 'Point', types) -> bool:
+        other_types = []
+        for type_ in types:
+            category = Map.get_category(type_)
+            if category is None:
+                other_types.append(type_)
+            elif self._has_category_collision(coordinates, category):
+                return True
+        if other_types:
+            other_types = tuple(other_types)
+            return any(isinstance(collision, other_types)
+                       for collision in self.get_collisions(coordinates))
+        return False
+
+    def _has_category_collision(self, coordinates, category):
+        category_grid = self._category_grids[category]
+        for grid_cell in Map.get_grid_cells(coordinates):
+            if grid_cell not in category_grid:
+                continue
+            for point in category_grid[grid_cell]:
+                if Map.are_intersected(coordinates, point):
+                    return True
+        return False
+
+    def count(self, category: str) -> int:
+        return self._counts[category]
+
+    @property
+    def stats(self) -> dict:
+        return {category: self._counts[category]
+                for category in OBJECT_CATEGORIES}
+
+    def get_cached(self, key, create_value):
+        if self._cache_version != self._version:
+            self._cache = {}
+            self._cache_version = self._version
+        if key not in self._cache:
+            self._cache[key] = create_value()
+        return self._cache[key]
+
+    def get_types_version(self, types: tuple) -> int:
+        return sum(version for type_, version in self._type_versions.items()
+                   if issubclass(type_, types))
+
+    def get_layout_cached(self, key, types: tuple, create_value, tag=None):
+        token = self.get_types_version(types), tag
+        cached = self._layout_cache.get(key)
+        if cached is None or cached[0] != token:
+            cached = token, create_value()
+            self._layout_cache[key] = cached
+        return cached[1]
+
+    def _get_activity_cells(self, map_object: 'MapObject'):
+        if map_object.is_dormant:
+            return self._dormant_cells
+        return self._active_cells
+
+    def copy(self) -> 'Map':
+        game_map = Map()
+        game_map.timers = self._timers
+        game_map.explosions = self.explosions
+        game_map.events = self.events
+        if self._collision_cache is not None:
+            game_map.enable_collision_cache(self.collision_stats)
+        for point, game_object in self.enumerate_all_objects():
+            game_map.add_map_object(game_object, point)
+        return game_map
 
     def get_map_objects(self, coordinates: Point):
         if coordinates not in self._objects:
             return []
         return self._objects[coordinates]
 
+    @staticmethod
+    def get_grid_cells(coordinates: Point):
+        grid_x, offset_x = divmod(coordinates.x, CELL_SIZE)
+        grid_y, offset_y = divmod(coordinates.y, CELL_SIZE)
+        if not offset_x and not offset_y:
+            return (grid_x, grid_y),
+        columns = (grid_x, grid_x + 1) if offset_x else (grid_x,)
+        rows = (grid_y, grid_y + 1) if offset_y else (grid_y,)
+        return [(column, row) for column in columns for row in rows]
+
     @staticmethod
     def round(number: int, cell_width: int) -> int:
         modulo = number % cell_width
@@ -43,8 +306,8 @@ class Map:
 
     @staticmethod
     def round_point(point: Point, cell_width: int):
-        return Point(Map.round(point.x, cell_width),
-                     Map.round(point.y, cell_width))
+        return Point.intern(Map.round(point.x, cell_width),
+                            Map.round(point.y, cell_width))
 
     def add_bomb(self, bomb: 'Bomb', coordinates: 'Point'):
         self.add_map_object(bomb, Map.round_point(coordinates, CELL_SIZE))
@@ -54,6 +317,104 @@ class Map:
             for game_object in self.get_map_objects(point):
                 yield point, game_object
 
+    def enumerate_active_objects(self):
+        for point in self._active_cells.keys():
+            for game_object in self._objects[point]:
+                if not game_object.is_dormant:
+                    yield point, game_object
+
+    def enumerate_dormant_objects(self):
+        for point in self._dormant_cells.keys():
+            for game_object in self._objects[point]:
+                if game_object.is_dormant:
+                    yield point, game_object
+
+    def get_collision_mask(self, coordinates: 'Point') -> int:
+        mask = 0
+        for cell in self.get_intersected_cells(coordinates):
+            mask |= self._masks[cell]
+        return mask
+
+    def get_passability(self, blocking_mask: int) -> 'PassabilityGrid':
+        return self.get_cached((PassabilityGrid, blocking_mask),
+                               lambda: PassabilityGrid(self, blocking_mask))
+
+    def get_blocker_distance(self, coordinates: 'Point',
+                             direction: 'Direction', max_distance: int):
+        shift = direction.value
+        if shift.x:
+            lines, keys = self._blocker_rows, self._blocker_row_keys
+            across, along, sign = coordinates.y, coordinates.x, shift.x
+        else:
+            lines, keys = self._blocker_columns, self._blocker_column_keys
+            across, along, sign = coordinates.x, coordinates.y, shift.y
+        nearest = None
+        first = bisect_right(keys, across - CELL_SIZE)
+        last = bisect_left(keys, across + CELL_SIZE)
+        for i in range(first, last):
+            line = lines[keys[i]]
+            if sign > 0:
+                index = bisect_right(line, along)
+                if index == len(line):
+                    continue
+                distance = line[index] - along
+            else:
+                index = bisect_left(line, along)
+                if index == 0:
+                    continue
+                distance = along - line[index - 1]
+            if nearest is None or distance < nearest:
+                nearest = distance
+        if nearest is None:
+            return None
+        steps = max(1, nearest // CELL_SIZE)
+        return steps if steps <= max_distance else None
+
+    @staticmethod
+    def _add_to_lines(lines, keys, key, value):
+        line = lines.get(key)
+        if line is None:
+            line = lines[key] = []
+            insort(keys, key)
+        insort(line, value)
+
+    @staticmethod
+    def _remove_from_lines(lines, keys, key, value):
+        line = lines[key]
+        del line[bisect_left(line, value)]
+        if not line:
+            del lines[key]
+            del keys[bisect_left(keys, key)]
+
+    def has_dormant_objects(self, coordinates: 'Point') -> bool:
+        return coordinates in self._dormant_cells
+
+    @property
+    def active_points(self):
+        return self._active_cells.keys()
+
+    def get_dormant_columns(self):
+        if self._dormant_columns_version != self._dormant_version:
+            columns = defaultdict(list)
+            for point in sorted(self._dormant_cells):
+                columns[point.x].append(point)
+            self._dormant_columns = sorted(columns), dict(columns)
+            self._dormant_columns_version = self._dormant_version
+        return self._dormant_columns
+
+    def get_dormant_animations(self) -> list:
+        if self._dormant_animations_version != self._dormant_version:
+            self._dormant_animations = [
+                Animation.of(game_object, point, Direction.Stand)
+                for point, game_object in self.enumerate_dormant_objects()]
+            self._dormant_animations_version = self._dormant_version
+        return self._dormant_animations
+
+    def share_dormant_animations(self, game_map: 'Map'):
+        if game_map._dormant_animations_version == game_map._dormant_version:
+            self._dormant_animations = game_map._dormant_animations
+            self._dormant_animations_version = self._dormant_version
+
     @staticmethod
     def are_intersected(first_coordinates: Point,
                         second_coordinates: Point):
@@ -63,75 +424,427 @@ class Map:
                abs(first_coordinates.y - second_coordinates.y) < \
                CELL_SIZE
 
+    def get_intersected_cells(self, coordinates: 'Point'):
+        grid_cells = Map.get_grid_cells(coordinates)
+        if len(grid_cells) == 1:
+            return list(self._grid.get(grid_cells[0], ()))
+        cells = []
+        for grid_cell in grid_cells:
+            if grid_cell not in self._grid:
+                continue
+            for point in self._grid[grid_cell]:
+                if point not in cells and \
+                        Map.are_intersected(coordinates, point):
+                    cells.append(point)
+        return cells
+
+    def enable_collision_cache(self, stats=None):
+        self.collision_stats = stats if stats is not None \
+            else {"hits": 0, "misses": 0}
+        self._collision_cache = {}
+        self._collision_cache_version = self._version
+
     def get_collisions(self, coordinates: 'Point'):
-        self._check_sorted_points()
-        set_x = self._find_intersections(coordinates, self._sorted_points_by_x,
-                                         lambda point: point.x, CELL_SIZE)
-        set_y = self._find_intersections(coordinates, self._sorted_points_by_y,
-                                         lambda point: point.y, CELL_SIZE)
+        cache = self._collision_cache
+        if cache is not None:
+            if self._collision_cache_version != self._version:
+                cache.clear()
+                self._collision_cache_version = self._version
+            collisions = cache.get(coordinates)
+            if collisions is not None:
+                self.collision_stats["hits"] += 1
+                return collisions
+            self.collision_stats["misses"] += 1
         collisions = []
-        for point in set_x.intersection(set_y):
-            for object in self.get_map_objects(point):
-                collisions.append(object)
+        for point in self.get_intersected_cells(coordinates):
+            collisions.extend(self._objects[point])
+        if cache is not None:
+            cache[coordinates] = collisions
         return collisions
 
-    def _check_sorted_points(self):
-        if self._sorted_points_by_x is None:
-            self._sorted_points_by_x = list(self._objects.keys())
-            self._sorted_points_by_x.sort(key=lambda point: point.x)
-        if self._sorted_points_by_y is None:
-            self._sorted_points_by_y = list(self._objects.keys())
-            self._sorted_points_by_y.sort(key=lambda point: point.y)
+    @property
+    def occupied_cells(self) -> set:
+        return set(self._objects.keys())
 
-    def _find_intersections(self, point, sorted_list, coordinates_func,
-                            cell_width):
 
-        def compare_func(point1, point2):
-            return coordinates_func(point1) - coordinates_func(point2)
+class PassabilityGrid:
 
-        point_index = self._binary_search(point, sorted_list, compare_func)
-        collisions_set = set()
-        for i in range(point_index, len(sorted_list)):
-            if abs(compare_func(point, sorted_list[i])) >= cell_width:
-                break
-            collisions_set.add(sorted_list[i])
+    def __init__(self, game_map: 'Map', blocking_mask: int):
+        self._map = game_map
+        self._blocking_mask = blocking_mask
+        self._cells = {}
 
-        for i in range(point_index - 1, -1, -1):
-            if abs(compare_func(point, sorted_list[i])) >= cell_width:
-                break
-            collisions_set.add(sorted_list[i])
-        return collisions_set
+    def is_passable(self, coordinates: 'Point') -> bool:
+        passable = self._cells.get(coordinates)
+        if passable is None:
+            passable = not self._map.get_collision_mask(coordinates) & \
+                self._blocking_mask
+            self._cells[coordinates] = passable
+        return passable
 
-    def _binary_search(self, point, sorted_list, compare_function):
-        first = 0
-        last = len(sorted_list) - 1
-        while first != last:
-            middle = (first + last) // 2
-            if compare_function(point, sorted_list[middle]) <= 0:
-                last = middle
-            else:
-                first = middle + 1
-        return first
+
+class MapChanges:
+
+    def __init__(self):
+        self.added = []
+
+    def add_map_object(self, map_object: 'MapObject', coordinates: 'Point'):
+        self.added.append((map_object, coordinates))
+
+    def add_bomb(self, bomb: 'Bomb', coordinates: 'Point'):
+        self.add_map_object(bomb, Map.round_point(coordinates, CELL_SIZE))
+
+
+class Timer:
+
+    __slots__ = ("tick", "callback", "args", "cancelled")
+
+    def __init__(self, tick: int, callback, args):
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+
+    def __init__(self, size=TIMER_WHEEL_SIZE):
+        self._slots = [[] for _ in range(size)]
+        self._now = 0
 
     @property
-    def occupied_cells(self) -> set:
-        return set(self._objects.keys())
+    def now(self) -> int:
+        return self._now
+
+    def schedule(self, delay: int, callback, *args):
+        if delay <= 0:
+            callback(*args)
+            return None
+        timer = Timer(self._now + delay, callback, args)
+        self._slots[timer.tick % len(self._slots)].append(timer)
+        return timer
+
+    def advance(self):
+        self._now += 1
+        index = self._now % len(self._slots)
+        slot = self._slots[index]
+        if not slot:
+            return
+        due = [timer for timer in slot if timer.tick == self._now]
+        if len(due) != len(slot):
+            self._slots[index] = [timer for timer in slot
+                                  if timer.tick != self._now]
+        else:
+            self._slots[index] = []
+        for timer in due:
+            if not timer.cancelled:
+                timer.callback(*timer.args)
+
+
+class ExplosionField:
+
+    DIRECTIONS = (Direction.Stand, Direction.Right, Direction.Left,
+                  Direction.Up, Direction.Down)
+    GROW_MARGIN = 8
+
+    def __init__(self, timers: 'TimerWheel'):
+        self._timers = timers
+        self._types = []
+        self._markers = []
+        self._left = 0
+        self._top = 0
+        self._width = 0
+        self._height = 0
+        self._end_ticks = []
+        self._directions = []
+        self._live = []
+        self._pending = []
+        self._views = {}
+
+    @staticmethod
+    def accepts(coordinates: 'Point') -> bool:
+        return coordinates.x % CELL_SIZE == 0 and \
+            coordinates.y % CELL_SIZE == 0
+
+    @property
+    def count(self) -> int:
+        now = self._timers.now
+        return sum(1 for end_ticks, live in zip(self._end_ticks, self._live)
+                   for index in live if end_ticks[index] > now)
+
+    def add(self, coordinates: 'Point', explosion_type, direction):
+        self._pending.append((coordinates, explosion_type, direction))
+
+    def commit(self):
+        if not self._pending:
+            return
+        end_tick = self._timers.now + EXPLOSION_LIVE - 1
+        cells = []
+        for coordinates, explosion_type, direction in self._pending:
+            type_code = self._get_type_code(explosion_type)
+            index = self._get_index(coordinates.x // CELL_SIZE,
+                                    coordinates.y // CELL_SIZE, grow=True)
+            self._end_ticks[type_code][index] = end_tick
+            self._directions[type_code][index] = \
+                self.DIRECTIONS.index(direction)
+            self._live[type_code][index] = coordinates
+            cells.append(coordinates)
+        self._pending = []
+        self._timers.schedule(EXPLOSION_LIVE, self._prune, cells)
+
+    def get_markers(self, coordinates: 'Point') -> list:
+        indexes = list(self._get_intersected_indexes(coordinates))
+        return [marker for marker, end_ticks
+                in zip(self._markers, self._end_ticks)
+                if self._is_live(end_ticks, indexes)]
+
+    def has_explosion(self, coordinates: 'Point', explosion_type) -> bool:
+        if explosion_type not in self._types:
+            return False
+        end_ticks = self._end_ticks[self._types.index(explosion_type)]
+        return self._is_live(end_ticks,
+                             self._get_intersected_indexes(coordinates))
+
+    def enumerate_live_cells(self):
+        now = self._timers.now
+        for end_ticks, live in zip(self._end_ticks, self._live):
+            for index, coordinates in live.items():
+                if end_ticks[index] >= now:
+                    yield coordinates
+
+    def get_animations(self) -> list:
+        animations = []
+        views = {}
+        for type_code, index, coordinates, end_tick in self._enumerate_live():
+            key = type_code, index, end_tick
+            view = self._views.get(key)
+            if view is None:
+                view = self._types[type_code](
+                    EXPLOSION_LIVE,
+                    self.DIRECTIONS[self._directions[type_code][index]])
+                view.start_timer(self._timers, end_tick)
+            views[key] = view
+            animations.append(Animation.of(view, coordinates, Direction.Stand))
+        self._views = views
+        return animations
+
+    def write_frame(self, frame: 'FrameBuffer'):
+        now = self._timers.now
+        for type_code, index, coordinates, end_tick in self._enumerate_live():
+            frame.add((self._types[type_code],
+                       self.DIRECTIONS[self._directions[type_code][index]]),
+                      coordinates, Direction.Stand, end_tick - now)
+
+    def _enumerate_live(self):
+        now = self._timers.now
+        for type_code, live in enumerate(self._live):
+            end_ticks = self._end_ticks[type_code]
+            for index, coordinates in live.items():
+                end_tick = end_ticks[index]
+                if end_tick >= now:
+                    yield type_code, index, coordinates, end_tick
+
+    def _is_live(self, end_ticks, indexes) -> bool:
+        now = self._timers.now
+        return any(end_ticks[index] >= now for index in indexes)
+
+    def _prune(self, cells):
+        now = self._timers.now
+        for coordinates in cells:
+            index = self._get_index(coordinates.x // CELL_SIZE,
+                                    coordinates.y // CELL_SIZE)
+            for end_ticks, live in zip(self._end_ticks, self._live):
+                if index in live and end_ticks[index] < now:
+                    del live[index]
+
+    def _get_type_code(self, explosion_type) -> int:
+        if explosion_type not in self._types:
+            self._types.append(explosion_type)
+            self._markers.append(explosion_type(EXPLOSION_LIVE))
+            size = self._width * self._height
+            self._end_ticks.append(array('q', [-1]) * size)
+            self._directions.append(array('B', [0]) * size)
+            self._live.append({})
+        return self._types.index(explosion_type)
+
+    def _get_intersected_indexes(self, coordinates: 'Point'):
+        for cell_y in range(coordinates.y // CELL_SIZE,
+                            (coordinates.y + CELL_SIZE - 1) // CELL_SIZE + 1):
+            for cell_x in range(coordinates.x // CELL_SIZE,
+                                (coordinates.x + CELL_SIZE - 1) //
+                                CELL_SIZE + 1):
+                index = self._get_index(cell_x, cell_y)
+                if index is not None:
+                    yield index
+
+    def _get_index(self, cell_x: int, cell_y: int, grow=False):
+        x = cell_x - self._left
+        y = cell_y - self._top
+        if 0 <= x < self._width and 0 <= y < self._height:
+            return y * self._width + x
+        if not grow:
+            return None
+        self._grow(cell_x, cell_y)
+        return self._get_index(cell_x, cell_y)
+
+    def _grow(self, cell_x: int, cell_y: int):
+        if self._width == 0:
+            left, top = cell_x, cell_y
+            right, bottom = cell_x + 1, cell_y + 1
+        else:
+            left = min(self._left, cell_x)
+            top = min(self._top, cell_y)
+            right = max(self._left + self._width, cell_x + 1)
+            bottom = max(self._top + self._height, cell_y + 1)
+        left -= self.GROW_MARGIN
+        top -= self.GROW_MARGIN
+        width = right - left + self.GROW_MARGIN
+        height = bottom - top + self.GROW_MARGIN
+        for type_code, live in enumerate(self._live):
+            end_ticks = array('q', [-1]) * (width * height)
+            directions = array('B', [0]) * (width * height)
+            new_live = {}
+            for index, coordinates in live.items():
+                new_index = (coordinates.y // CELL_SIZE - top) * width + \
+                    coordinates.x // CELL_SIZE - left
+                end_ticks[new_index] = self._end_ticks[type_code][index]
+                directions[new_index] = self._directions[type_code][index]
+                new_live[new_index] = coordinates
+            self._end_ticks[type_code] = end_ticks
+            self._directions[type_code] = directions
+            self._live[type_code] = new_live
+        self._left, self._top = left, top
+        self._width, self._height = width, height
+        self._views = {}
+
+
+class GameEvent:
+
+    __slots__ = ()
+
+
+class BombPlaced(GameEvent):
+
+    __slots__ = ("bomb", "owner", "location")
+
+    def __init__(self, bomb, owner, location):
+        self.bomb = bomb
+        self.owner = owner
+        self.location = location
+
+
+class ExplosionCells(GameEvent):
+
+    __slots__ = ("explosion_type", "center", "rays")
+
+    def __init__(self, explosion_type, center, rays):
+        self.explosion_type = explosion_type
+        self.center = center
+        self.rays = rays
+
+
+class ObjectDied(GameEvent):
+
+    __slots__ = ("object", "location")
+
+    def __init__(self, game_object, location):
+        self.object = game_object
+        self.location = location
+
+
+class BonusPickedUp(GameEvent):
+
+    __slots__ = ("bonus", "location")
+
+    def __init__(self, bonus, location):
+        self.bonus = bonus
+        self.location = location
+
+
+class BuffStarted(GameEvent):
+
+    __slots__ = ("player", "buff")
+
+    def __init__(self, player, buff):
+        self.player = player
+        self.buff = buff
+
+
+class BuffEnded(GameEvent):
+
+    __slots__ = ("player", "buff")
+
+    def __init__(self, player, buff):
+        self.player = player
+        self.buff = buff
+
+
+class PlayerMoved(GameEvent):
+
+    __slots__ = ("player", "old_location", "new_location")
+
+    def __init__(self, player, old_location, new_location):
+        self.player = player
+        self.old_location = old_location
+        self.new_location = new_location
+
+
+class EventStream:
+
+    def __init__(self):
+        self._subscribers = []
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(self, callback, event_types=()):
+        self._subscribers.append((callback, tuple(event_types)))
+
+    def unsubscribe(self, callback):
+        self._subscribers = [(subscriber, event_types)
+                             for subscriber, event_types in self._subscribers
+                             if subscriber != callback]
+
+    def emit(self, event: 'GameEvent'):
+        for callback, event_types in self._subscribers:
+            if not event_types or isinstance(event, event_types):
+                callback(event)
 
 
 class Game:
 
-    def __init__(self, game_map: 'Map', player: 'Player'):
+    def __init__(self, game_map: 'Map', player: 'Player',
+                 incremental=False, instant_chain_reactions=False,
+                 explosion_field=False, collision_cache=False):
+        self._timers = TimerWheel()
+        self._collision_stats = {"hits": 0, "misses": 0} \
+            if collision_cache else None
+        self._instant_chain_reactions = instant_chain_reactions
+        self._explosions = ExplosionField(self._timers) \
+            if explosion_field else None
+        self._events = EventStream()
         self._map = game_map
+        self._attach(self._map)
         self._player = player
+        self._incremental = incremental
+        self._back_map = None
+        self._map_versions = None
+        self._map_pool = []
 
     @property
     def monster_count(self):
-        monster_count = 0
-        for cell in self._map.occupied_cells:
-            for obj in self._map.get_map_objects(cell):
-                if isinstance(obj, Monster):
-                    monster_count += 1
-        return monster_count
+        return self._map.count("monsters")
+
+    @property
+    def stats(self) -> dict:
+        stats = self._map.stats
+        if self._explosions is not None:
+            stats["explosions"] += self._explosions.count
+        return stats
 
     @property
     def player(self) -> 'Player':
@@ -141,83 +854,408 @@ class Game:
     def map(self):
         return self._map
 
+    @property
+    def timers(self) -> 'TimerWheel':
+        return self._timers
+
+    def get_explosion_animations(self) -> list:
+        if self._explosions is None:
+            return []
+        return self._explosions.get_animations()
+
+    def subscribe(self, callback, *event_types):
+        self._events.subscribe(callback, event_types)
+        self._attach_events()
+
+    def unsubscribe(self, callback):
+        self._events.unsubscribe(callback)
+        self._attach_events()
+
+    def _attach_events(self):
+        self._attach(self._map)
+        if self._back_map is not None:
+            self._attach(self._back_map)
+
+    def make_frame(self, frame=None) -> 'FrameBuffer':
+        if frame is None:
+            frame = FrameBuffer()
+        animations = self.make_turn()
+        frame.clear()
+        frame.extend(animations)
+        if self._explosions is not None:
+            self._explosions.write_frame(frame)
+        return frame
+
     def set_map(self, map):
         self._map = map
+        self._attach(self._map)
+        self._back_map = None
+
+    @property
+    def collision_cache_stats(self):
+        if self._collision_stats is None:
+            return None
+        return dict(self._collision_stats)
+
+    def _attach(self, game_map):
+        game_map.timers = self._timers
+        game_map.explosions = self._explosions
+        game_map.events = self._events \
+            if self._events.has_subscribers else None
+        if self._collision_stats is not None:
+            game_map.enable_collision_cache(self._collision_stats)
 
     def make_turn(self):
-        animations = []
-        intermediate_map = Map()
-        for point in self._map.occupied_cells:
-            for game_object in self._map.get_map_objects(point):
-                action = game_object.move(point, self._map)
-                new_animations = action.change_game_state(
-                    game_object, point, self._map, intermediate_map
-                )
-                for animation in new_animations:
-                    animations.append(animation)
+        self._timers.advance()
+        if self._instant_chain_reactions:
+            self._resolve_chain_reactions(self._map)
+        if self._incremental:
+            return self._make_incremental_turn()
+        intermediate_map = self._take_map()
+        for point, game_object in self._map.enumerate_dormant_objects():
+            intermediate_map.add_map_object(game_object, point)
+        intermediate_map.share_dormant_animations(self._map)
+        animations = list(intermediate_map.get_dormant_animations())
+        for point, game_object in self._map.enumerate_active_objects():
+            action = game_object.move(point, self._map)
+            new_animations = action.change_game_state(
+                game_object, point, self._map, intermediate_map
+            )
+            for animation in new_animations:
+                animations.append(animation)
+
+        dead = self._solve_collisions(intermediate_map, self._explosions)
+        if self._map.events is not None:
+            self._emit_deaths(self._map.events, dead)
+        game_map = self._take_map()
+        self._attach(game_map)
+        for point, game_object in intermediate_map.enumerate_all_objects():
+            if not game_object.is_dead:
+                game_map.add_map_object(game_object, point)
+        if not any(game_object.is_dormant for game_object, _ in dead):
+            game_map.share_dormant_animations(intermediate_map)
+
+        self._release_map(intermediate_map)
+        self._release_map(self._map)
+        self._map = game_map
+        return animations
 
+    def _take_map(self) -> 'Map':
+        if self._map_pool:
+            return self._map_pool.pop()
         game_map = Map()
-        for point in intermediate_map.occupied_cells:
-            for game_object in intermediate_map.get_map_objects(point):
-                other_objects = intermediate_map.get_collisions(point)
-                game_object.solve_collision(other_objects)
-                if not game_object.is_dead:
-                    game_map.add_map_object(game_object, point)
-
+        game_map.pool = self._map_pool
+        return game_map
+
+    def _release_map(self, game_map: 'Map'):
+        if game_map.pool is self._map_pool:
+            game_map.clear()
+            self._map_pool.append(game_map)
+
+    def _make_incremental_turn(self):
+        old_map = self._map
+        game_map = self._get_back_map()
+        changes = MapChanges()
+        animations = list(old_map.get_dormant_animations())
+        removed = []
+        added = []
+        for point, game_object in old_map.enumerate_active_objects():
+            first_change = len(changes.added)
+            action = game_object.move(point, old_map)
+            new_animations = action.change_game_state(
+                game_object, point, old_map, changes
+            )
+            animations.extend(new_animations)
+            stays = False
+            for i in range(first_change, len(changes.added)):
+                added_object, added_point = changes.added[i]
+                if added_object is game_object and added_point == point \
+                        and not stays:
+                    stays = True
+                else:
+                    added.append(changes.added[i])
+            if not stays:
+                removed.append((game_object, point))
+
+        self._apply_changes(game_map, removed, added)
+        dead = self._solve_collisions(game_map, self._explosions)
+        if game_map.events is not None:
+            self._emit_deaths(game_map.events, dead)
+        self._apply_changes(game_map, dead, ())
+
+        self._apply_changes(old_map, removed, added)
+        self._apply_changes(old_map, dead, ())
         self._map = game_map
+        self._back_map = old_map
+        self._map_versions = game_map.version, old_map.version
         return animations
 
+    @staticmethod
+    def _emit_deaths(events, dead):
+        for game_object, point in dead:
+            if game_object.category & BONUS:
+                events.emit(BonusPickedUp(game_object, point))
+            events.emit(ObjectDied(game_object, point))
+
+    @staticmethod
+    def _resolve_chain_reactions(game_map):
+        exploding = set()
+        explosions = []
+        for point, bomb in game_map.enumerate_objects("bombs"):
+            explosion = bomb.get_explosion(point, game_map)
+            if explosion is not None:
+                exploding.add(bomb)
+                explosions.append(explosion)
+        while explosions:
+            explosion = explosions.pop()
+            for cell in explosion.get_trigger_cells(game_map):
+                if not game_map.get_collision_mask(cell) & BOMB:
+                    continue
+                for point in game_map.get_intersected_cells(cell):
+                    for game_object in game_map.get_map_objects(point):
+                        if game_object.category & BOMB and \
+                                game_object not in exploding:
+                            exploding.add(game_object)
+                            explosions.append(game_object.detonate(point))
+
+    @staticmethod
+    def _find_contacts(game_map):
+        columns_x, columns = game_map.get_dormant_columns()
+        active_points = sorted(game_map.active_points)
+        contacts = {point: {point} for point in active_points}
+        touched_cells = set()
+        first = 0
+        for i, point in enumerate(active_points):
+            while active_points[first].x <= point.x - CELL_SIZE:
+                first += 1
+            point_contacts = contacts[point]
+            for j in range(first, i):
+                other_point = active_points[j]
+                if abs(other_point.y - point.y) < CELL_SIZE:
+                    point_contacts.add(other_point)
+                    contacts[other_point].add(point)
+            low = point.y - CELL_SIZE
+            high = point.y + CELL_SIZE
+            for k in range(bisect_right(columns_x, point.x - CELL_SIZE),
+                           bisect_left(columns_x, point.x + CELL_SIZE)):
+                x = columns_x[k]
+                column = columns[x]
+                for m in range(bisect_right(column, (x, low)),
+                               bisect_left(column, (x, high))):
+                    point_contacts.add(column[m])
+                    touched_cells.add(column[m])
+        return contacts, touched_cells
+
+    @staticmethod
+    def _solve_collisions(game_map, explosions=None):
+        dead = []
+        contacts, touched_cells = Game._find_contacts(game_map)
+        if explosions is not None:
+            explosions.commit()
+            for explosion_point in explosions.enumerate_live_cells():
+                for cell in game_map.get_intersected_cells(explosion_point):
+                    if game_map.has_dormant_objects(cell):
+                        touched_cells.add(cell)
+        for point, game_object in game_map.enumerate_active_objects():
+            other_objects = []
+            for cell in contacts[point]:
+                other_objects.extend(game_map.get_map_objects(cell))
+            if explosions is not None:
+                other_objects.extend(explosions.get_markers(point))
+            if len(other_objects) > 1:
+                game_object.solve_collision(other_objects)
+            if game_object.is_dead:
+                dead.append((game_object, point))
+
+        for point in touched_cells:
+            other_objects = game_map.get_collisions(point)
+            if explosions is not None:
+                other_objects = other_objects + explosions.get_markers(point)
+            for game_object in game_map.get_map_objects(point):
+                if game_object.is_dormant:
+                    game_object.solve_collision(other_objects)
+                    if game_object.is_dead:
+                        dead.append((game_object, point))
+        return dead
+
+    def _get_back_map(self):
+        if self._back_map is None or self._map_versions != \
+                (self._map.version, self._back_map.version):
+            self._back_map = self._map.copy()
+        return self._back_map
+
+    @staticmethod
+    def _apply_changes(game_map, removed, added):
+        for game_object, point in removed:
+            game_map.remove_map_object(game_object, point)
+        for game_object, point in added:
+            game_map.add_map_object(game_object, point)
+
 
 class Animation:
 
+    __slots__ = ("object", "location", "direction")
+
     def __init__(self, object, location, direction):
         self.object = object
         self.location = location
         self.direction = direction
 
+    @staticmethod
+    def of(game_object, location, direction) -> 'Animation':
+        animation = game_object.last_animation
+        if animation is None or animation.direction is not direction or \
+                animation.location != location:
+            animation = Animation(game_object, location, direction)
+            game_object.last_animation = animation
+        return animation
+
+
+class FrameBuffer:
+
+    DIRECTIONS = (Direction.Stand, Direction.Right, Direction.Left,
+                  Direction.Up, Direction.Down)
+
+    def __init__(self):
+        self.kinds = []
+        self._kind_ids = {}
+        self._direction_codes = {direction: code for code, direction
+                                 in enumerate(self.DIRECTIONS)}
+        self.kind_ids = array('H')
+        self.xs = array('i')
+        self.ys = array('i')
+        self.directions = array('B')
+        self.states = array('i')
+
+    def __len__(self):
+        return len(self.kind_ids)
+
+    def get_kind_id(self, kind) -> int:
+        kind_id = self._kind_ids.get(kind)
+        if kind_id is None:
+            kind_id = self._kind_ids[kind] = len(self.kinds)
+            self.kinds.append(kind)
+        return kind_id
+
+    def clear(self):
+        del self.kind_ids[:]
+        del self.xs[:]
+        del self.ys[:]
+        del self.directions[:]
+        del self.states[:]
+
+    def add(self, kind, location: 'Point', direction, state: int):
+        self.kind_ids.append(self.get_kind_id(kind))
+        self.xs.append(location[0])
+        self.ys.append(location[1])
+        self.directions.append(self._direction_codes[direction])
+        self.states.append(state)
+
+    def extend(self, animations):
+        for animation in animations:
+            game_object = animation.object
+            self.add(game_object.frame_kind, animation.location,
+                     animation.direction, game_object.frame_state)
+
+    def rows(self):
+        return zip((self.kinds[kind_id] for kind_id in self.kind_ids),
+                   self.xs, self.ys,
+                   (self.DIRECTIONS[code] for code in self.directions),
+                   self.states)
+
 
 class Move:
 
+    __slots__ = ("_direction",)
+
+    _instances = {}
+
     def __init__(self, direction):
         self._direction = direction
 
+    @staticmethod
+    def get(direction) -> 'Move':
+        move = Move._instances.get(direction)
+        if move is None:
+            move = Move._instances[direction] = Move(direction)
+        return move
+
     @property
     def direction(self):
         return self._direction
 
     def change_game_state(self, game_object, coordinates, old_map, game_map):
-        collisions = old_map.get_collisions(coordinates +
-                                            self.direction.value)
+        animations = self._move(game_object, coordinates, old_map, game_map)
+        if old_map.events is not None and game_object.category & PLAYER:
+            direction = animations[0].direction
+            if direction is not Direction.Stand:
+                old_map.events.emit(PlayerMoved(
+                    game_object, coordinates, coordinates + direction.value))
+        return animations
+
+    def _move(self, game_object, coordinates, old_map, game_map):
+        blocking_mask = game_object.get_blocking_mask(coordinates, old_map)
+        if blocking_mask is not None:
+            return self._move_on_grid(game_object, coordinates, game_map,
+                                      old_map.get_passability(blocking_mask))
+        shift = self.direction.value
+        collisions = old_map.get_collisions(coordinates + shift)
         old_collisions = old_map.get_collisions(coordinates)
         if game_object.can_move(collisions, old_collisions):
-            game_map.add_map_object(game_object,
-                                    coordinates + self.direction.value)
-            return Animation(game_object, coordinates, self.direction),
+            game_map.add_map_object(game_object, coordinates + shift)
+            return Animation.of(game_object, coordinates, self.direction),
         else:
             directions = (Direction.Up, Direction.Down) \
                     if self.direction in (Direction.Right, Direction.Left) \
                     else (Direction.Right, Direction.Left)
             for new_direction in directions:
+                side_shift = new_direction.value
                 for i in range(1, CORNER_SIZE + 1):
-                    point = i * new_direction.value + self.direction.value
-                    collisions = old_map.get_collisions(coordinates + point)
+                    collisions = old_map.get_collisions(coordinates.translate(
+                        i * side_shift.x + shift.x, i * side_shift.y + shift.y
+                    ))
                     if game_object.can_move(collisions, old_collisions):
                         game_map.add_map_object(game_object,
-                                                coordinates +
-                                                new_direction.value)
-                        return Animation(game_object, coordinates,
-                                         new_direction),
+                                                coordinates + side_shift)
+                        return Animation.of(game_object, coordinates,
+                                            new_direction),
+        game_map.add_map_object(game_object, coordinates)
+        return Animation.of(game_object, coordinates, Direction.Stand),
+
+    def _move_on_grid(self, game_object, coordinates, game_map, passability):
+        shift = self.direction.value
+        if passability.is_passable(coordinates + shift):
+            game_map.add_map_object(game_object, coordinates + shift)
+            return Animation.of(game_object, coordinates, self.direction),
+        directions = (Direction.Up, Direction.Down) \
+            if self.direction in (Direction.Right, Direction.Left) \
+            else (Direction.Right, Direction.Left)
+        for new_direction in directions:
+            side_shift = new_direction.value
+            for i in range(1, CORNER_SIZE + 1):
+                if passability.is_passable(coordinates.translate(
+                        i * side_shift.x + shift.x,
+                        i * side_shift.y + shift.y)):
+                    game_map.add_map_object(game_object,
+                                            coordinates + side_shift)
+                    return Animation.of(game_object, coordinates,
+                                        new_direction),
         game_map.add_map_object(game_object, coordinates)
-        return Animation(game_object, coordinates, Direction.Stand),
+        return Animation.of(game_object, coordinates, Direction.Stand),
 
 
 class PutBomb:
 
-    def __init__(self, bomb):
+    __slots__ = ("_bomb", "_bomb_factory")
+
+    def __init__(self, bomb=None, bomb_factory=None):
         self._bomb = bomb
+        self._bomb_factory = bomb_factory
 
     @property
     def bomb(self):
+        if self._bomb is None:
+            self._bomb = self._bomb_factory()
         return self._bomb
 
     def change_game_state(self, game_object, coordinates, old_map, game_map):
@@ -227,53 +1265,106 @@ class PutBomb:
         if collisions == [game_object]:
             game_map.add_bomb(self.bomb, coordinates)
             game_object.set_last_bomb(self.bomb)
-            animations.append(Animation(self.bomb, coordinates,
-                                        Direction.Stand))
+            if old_map.events is not None:
+                old_map.events.emit(BombPlaced(self.bomb, game_object,
+                                               coordinates))
+            animations.append(Animation.of(self.bomb, coordinates,
+                                           Direction.Stand))
         game_map.add_map_object(game_object, coordinates)
-        animations.append(Animation(game_object, coordinates,
-                                    Direction.Stand))
+        animations.append(Animation.of(game_object, coordinates,
+                                       Direction.Stand))
         return animations
 
 
 class Explose:
 
+    __slots__ = ("_explosion_type", "_center", "_radius", "_rays")
+
     def __init__(self, explosion_type, center: 'Point', radius: int):
         self._explosion_type = explosion_type
         self._center = center
         self._radius = radius
+        self._rays = None
+
+    def cast(self, old_map: 'Map') -> list:
+        if self._rays is None:
+            self._rays = []
+            for direction in (Direction.Right, Direction.Left,
+                              Direction.Up, Direction.Down):
+                shift = direction.value
+                length = old_map.get_blocker_distance(
+                    self._center, direction, self._radius - 1)
+                if length is None:
+                    length = self._radius - 1
+                for i in range(1, length + 1):
+                    self._rays.append((Point.intern(
+                        self._center.x + i * shift.x * CELL_SIZE,
+                        self._center.y + i * shift.y * CELL_SIZE
+                    ), direction))
+        return self._rays
+
+    def get_trigger_cells(self, old_map: 'Map'):
+        yield self._center
+        if self._explosion_type is ExplosionBlock:
+            for point, _ in self.cast(old_map):
+                yield point
 
     def change_game_state(self, game_object, coordinates, old_map, game_map):
+        if old_map.events is not None:
+            if game_object is not None:
+                old_map.events.emit(ObjectDied(game_object, coordinates))
+            old_map.events.emit(ExplosionCells(
+                self._explosion_type, coordinates, self.cast(old_map)))
+        explosions = old_map.explosions
+        if explosions is not None and explosions.accepts(coordinates):
+            explosions.add(coordinates, ExplosionBlock, Direction.Stand)
+            for point, direction in self.cast(old_map):
+                explosions.add(point, self._explosion_type, direction)
+            return ()
         animations = []
-        stop_explosion_classes = (Block, Bomb, Bonus)
-        game_map.add_map_object(ExplosionBlock(EXPLOSION_LIVE), coordinates)
-        for direction in (Direction.Right, Direction.Left,
-                          Direction.Up, Direction.Down):
-            for i in range(1, self._radius):
-                point = Point(coordinates.x +
-                              i * direction.value.x * CELL_SIZE,
-                              coordinates.y +
-                              i * direction.value.y * CELL_SIZE)
-                explosion = self._explosion_type(EXPLOSION_LIVE, direction)
-                animations.append(Animation(explosion, point, Direction.Stand))
-                game_map.add_map_object(explosion, point)
-                collisions = old_map.get_collisions(point)
-                if any(isinstance(game_object, class_)
-                       for game_object in collisions
-                       for class_ in stop_explosion_classes):
-                    break
+        center = ExplosionBlock(EXPLOSION_LIVE)
+        center.start_timer(old_map.timers)
+        game_map.add_map_object(center, coordinates)
+        for point, direction in self.cast(old_map):
+            explosion = self._explosion_type(EXPLOSION_LIVE, direction)
+            explosion.start_timer(old_map.timers)
+            animations.append(Animation.of(explosion, point, Direction.Stand))
+            game_map.add_map_object(explosion, point)
         return animations
 
 
 class MapObject:
 
+    __slots__ = ("_is_dead", "last_animation")
+
+    category = 0
+    is_dormant = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for base in cls.__bases__:
+            cls.category |= getattr(base, "category", 0)
+
     def __init__(self):
         self._is_dead = False
+        self.last_animation = None
+
+    @property
+    def frame_kind(self):
+        return type(self)
+
+    @property
+    def frame_state(self) -> int:
+        return 0
 
     def can_move(self, collisions, old_collisions):
         return True
 
+    def get_blocking_mask(self, coordinates: 'Point', old_map: 'Map'):
+        return None
+
     def move(self, coordinates: 'Point', old_map: 'Map'):
-        return Move(Direction.Stand)
+        return Move.get(Direction.Stand)
 
     def solve_collision(self, other_objects):
         pass
@@ -289,6 +1380,8 @@ class MapObject:
 
 class BombCreator:
 
+    __slots__ = ("_radius", "_bomb_type")
+
     def __init__(self):
         self._radius = START_EXPLOSION_RADIUS
         self._bomb_type = Bomb
@@ -305,6 +1398,11 @@ class BombCreator:
 
 class Player(MapObject):
 
+    __slots__ = ("_controller", "_last_bomb", "_bomb_creator", "_buffs",
+                 "_new_buffs", "_ended_buffs", "immune", "_ghost_mode")
+
+    category = PLAYER
+
     def __init__(self, controller):
         super().__init__()
         self._controller = controller
@@ -312,9 +1410,15 @@ class Player(MapObject):
         self._last_bomb = None
         self._bomb_creator = BombCreator()
         self._buffs = []
+        self._new_buffs = []
+        self._ended_buffs = []
         self.immune = False
         self._ghost_mode = False
 
+    @property
+    def ghost_mode(self) -> bool:
+        return self._ghost_mode
+
     def set_ghost_mode(self, value):
         self._ghost_mode = value
 
@@ -337,95 +1441,196 @@ class Player(MapObject):
     def add_buff(self, buff):
         buff.start(self)
         self._buffs.append(buff)
+        self._new_buffs.append(buff)
 
-    def move(self, coordinates: 'Point', old_map: 'Map'):
-
-        for buff in self._buffs:
-            buff.time -= 1
-            if buff.time == 0:
-                buff.end(self)
+    def _end_buff(self, buff):
+        buff.end(self)
+        self._buffs.remove(buff)
+        self._ended_buffs.append(buff)
 
-        self._buffs = [buff for buff in self._buffs if buff.time > 0]
+    def move(self, coordinates: 'Point', old_map: 'Map'):
+        if self._new_buffs:
+            for buff in self._new_buffs:
+                old_map.timers.schedule(buff.time - 1, self._end_buff, buff)
+                if old_map.events is not None:
+                    old_map.events.emit(BuffStarted(self, buff))
+            self._new_buffs = []
+        if self._ended_buffs:
+            if old_map.events is not None:
+                for buff in self._ended_buffs:
+                    old_map.events.emit(BuffEnded(self, buff))
+            self._ended_buffs = []
         return self._controller.select_action()
 
+    def get_blocking_mask(self, coordinates: 'Point', old_map: 'Map'):
+        if self._ghost_mode:
+            return 0
+        if self._last_bomb is not None and \
+                old_map.get_collision_mask(coordinates) & BOMB and \
+                self._last_bomb in old_map.get_collisions(coordinates):
+            return None
+        return BLOCK | BOMB
+
     def can_move(self, collisions, old_collisions):
         if self._ghost_mode:
             return True
-        object_types = [Block, Bomb]
-        return all(not isinstance(object_, type_)
-                   for object_ in collisions
-                   for type_ in object_types
-                   if not (object_ is self._last_bomb and
-                           self._last_bomb in old_collisions))
+        last_bomb = self._last_bomb \
+            if self._last_bomb in old_collisions else None
+        return not get_category_mask(
+            object_ for object_ in collisions if object_ is not last_bomb
+        ) & (BLOCK | BOMB)
 
     def solve_collision(self, other_objects: list):
-        object_types = [Monster, ExplosionBlock]
-        if any(isinstance(object_, type_)
-               for object_ in other_objects
-               for type_ in object_types) and not self.immune:
+        if get_category_mask(other_objects) & (MONSTER | EXPLOSION) and \
+                not self.immune:
             self._is_dead = True
 
 
 class Monster(MapObject):
 
+    __slots__ = ()
+
+    category = MONSTER
+
     def solve_collision(self, other_objects):
-        if any(isinstance(object_, ExplosionBlock)
-               for object_ in other_objects):
+        if get_category_mask(other_objects) & EXPLOSION:
             self._is_dead = True
 
 
 class Block(MapObject):
-    pass
+
+    __slots__ = ()
+
+    category = BLOCK
+    is_dormant = True
 
 
 class Bomb(MapObject):
 
+    __slots__ = ("_tick_delay", "_explosion_radius", "_explosion_type",
+                 "_fuse", "_fuse_lit", "_detonation", "_timers")
+
+    category = BOMB
+
     def __init__(self, tick_delay: int, explosion_radius: int):
         super().__init__()
         self._tick_delay = tick_delay
         self._explosion_radius = explosion_radius
         self._explosion_type = ExplosionBlock
+        self._fuse = None
+        self._fuse_lit = False
+        self._detonation = None
+        self._timers = None
+
+    @property
+    def tick_delay(self) -> int:
+        if self._fuse is None:
+            return self._tick_delay
+        return max(self._fuse.tick - self._timers.now, 0)
+
+    @property
+    def explosion_radius(self) -> int:
+        return self._explosion_radius
+
+    @property
+    def explosion_type(self):
+        return self._explosion_type
 
     def move(self, coordinates: 'Point', old_map: 'Map'):
-        if ExplosionBlock in map(type, old_map.get_collisions(coordinates)):
-            return Explose(self._explosion_type, coordinates,
-                           self._explosion_radius)
-        self._tick_delay -= 1
-        if self._tick_delay == 0:
-            self._is_dead = True
-            return Explose(self._explosion_type, coordinates,
-                           self._explosion_radius)
-        return Move(Direction.Stand)
+        explosion = self.get_explosion(coordinates, old_map)
+        if explosion is not None:
+            self._detonation = None
+            return explosion
+        return Move.get(Direction.Stand)
+
+    def get_explosion(self, coordinates: 'Point', old_map: 'Map'):
+        if self._detonation is not None:
+            return self._detonation
+        if not self._fuse_lit:
+            self._fuse_lit = True
+            self._timers = old_map.timers
+            self._fuse = old_map.timers.schedule(self._tick_delay - 1,
+                                                 self._burn_out)
+        if ExplosionBlock in map(type, old_map.get_collisions(coordinates)) \
+                or old_map.explosions is not None and \
+                old_map.explosions.has_explosion(coordinates, ExplosionBlock):
+            return self.detonate(coordinates)
+        if self._is_dead:
+            self._detonation = Explose(self._explosion_type, coordinates,
+                                       self._explosion_radius)
+        return self._detonation
+
+    def detonate(self, coordinates: 'Point') -> 'Explose':
+        if self._fuse is not None:
+            self._fuse.cancel()
+        self._detonation = Explose(self._explosion_type, coordinates,
+                                   self._explosion_radius)
+        return self._detonation
+
+    def _burn_out(self):
+        self._is_dead = True
 
 
 class ExplosionBlock(MapObject):
 
+    __slots__ = ("_life_time", "_direction", "_timers", "_end_tick")
+
+    category = EXPLOSION
+
     def __init__(self, life_time: int, direction=Direction.Stand):
         super().__init__()
         self._life_time = life_time
         self._direction = direction
+        self._timers = None
+        self._end_tick = None
 
     @property
     def life_time(self):
-        return self._life_time
+        if self._timers is None:
+            return self._life_time
+        return max(self._end_tick - self._timers.now, 0)
 
     @property
     def direction(self):
         return self._direction
 
-    def solve_collision(self, other_objects):
-        self._life_time -= 1
-        if self._life_time == 0:
-            self._is_dead = True
+    @property
+    def frame_kind(self):
+        return type(self), self._direction
+
+    @property
+    def frame_state(self) -> int:
+        return self.life_time
+
+    def start_timer(self, timers: 'TimerWheel', end_tick=None):
+        self._timers = timers
+        if end_tick is not None:
+            self._end_tick = end_tick
+            return
+        self._end_tick = timers.now + self._life_time - 1
+        timers.schedule(self._life_time - 1, self._expire)
+
+    def move(self, coordinates: 'Point', old_map: 'Map'):
+        if self._timers is None:
+            self.start_timer(old_map.timers)
+        return Move.get(Direction.Stand)
+
+    def _expire(self):
+        self._is_dead = True
 
 
 class Bonus(MapObject):
 
+    __slots__ = ()
+
+    category = BONUS
+    is_dormant = True
+
     def solve_collision(self, other_objects):
-        if any(isinstance(object_, Player) for object_ in other_objects):
+        if get_category_mask(other_objects) & PLAYER:
             self._is_dead = True
             player = next(obj for obj in other_objects
-                          if isinstance(obj, Player))
+                          if obj.category & PLAYER)
             self.add_bonus(player)
 
     def add_bonus(self, player):
@@ -434,6 +1639,8 @@ class Bonus(MapObject):
 
 class Buff:
 
+    __slots__ = ("time",)
+
     def __init__(self):
         self.time = BUFF_TIME
 
@@ -442,3 +1649,13 @@ class Buff:
 
     def end(self, player):
         pass
+
+
+OBJECT_CATEGORIES = {
+    "players": Player,
+    "monsters": Monster,
+    "blocks": Block,
+    "bombs": Bomb,
+    "explosions": ExplosionBlock,
+    "bonuses": Bonus
+}
@@ -1,42 +1,58 @@
 #!/usr/bin/python3
 
 from enum import Enum
+from operator import itemgetter
 
 
-class Point:
+_new_tuple = tuple.__new__
 
-    def __init__(self, x: int, y: int):
-        self._x = x
-        self._y = y
 
-    @property
-    def x(self) -> int:
-        return self._x
+class Point(tuple):
 
-    @property
-    def y(self) -> int:
-        return self._y
+    __slots__ = ()
+
+    _interned = {}
+
+    def __new__(cls, x: int, y: int):
+        return _new_tuple(cls, (x, y))
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    x = property(itemgetter(0))
+    y = property(itemgetter(1))
+
+    @staticmethod
+    def intern(x: int, y: int) -> 'Point':
+        point = Point._interned.get((x, y))
+        if point is None:
+            point = _new_tuple(Point, (x, y))
+            Point._interned[point] = point
+        return point
+
+    def translate(self, dx: int, dy: int) -> 'Point':
+        return _new_tuple(Point, (self[0] + dx, self[1] + dy))
 
     def __add__(self, other_point: 'Point') -> 'Point':
-        return Point(self.x + other_point.x, self.y + other_point.y)
+        return _new_tuple(Point, (self[0] + other_point[0],
+                                  self[1] + other_point[1]))
 
-    def __mul__(self, coefficient: int):
-        return Point(self.x * coefficient, self.y * coefficient)
+    def __sub__(self, other_point: 'Point') -> 'Point':
+        return _new_tuple(Point, (self[0] - other_point[0],
+                                  self[1] - other_point[1]))
 
-    def __rmul__(self, coefficient: int):
-        return self * coefficient
+    def __mul__(self, coefficient: int) -> 'Point':
+        return _new_tuple(Point, (self[0] * coefficient,
+                                  self[1] * coefficient))
 
-    def __eq__(self, o: object) -> bool:
-        return type(o) is Point and self.x == o.x and self.y == o.y
+    def __rmul__(self, coefficient: int) -> 'Point':
+        return self * coefficient
 
-    def __hash__(self) -> int:
-        return hash(self.x)*31 + hash(self.y)
+    def __neg__(self) -> 'Point':
+        return _new_tuple(Point, (-self[0], -self[1]))
 
     def __str__(self):
-        return "(" + str(self._x) + ", " + str(self._y) + ")"
-
-    def __sub__(self, other):
-        return self + (other * (-1))
+        return "(" + str(self[0]) + ", " + str(self[1]) + ")"
 
 
 class Direction(Enum):
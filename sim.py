@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+
+import argparse
+import random
+import time
+from logic import Game, Player, Move, PutBomb, FrameBuffer, CELL_SIZE
+from point import Direction, Point
+from child_classes import SimpleBomb
+from controller import PlayerController
+from level_creator import LevelCreator, DEFAULT_LEGEND
+
+RANDOM_LEVEL_SIZE = 15
+DEFAULT_TICKS = 1000
+
+
+class IdleController(PlayerController):
+
+    def select_action(self):
+        return Move.get(Direction.Stand)
+
+
+class ScriptedController(PlayerController):
+
+    DIRECTIONS = {
+        "w": Direction.Down,
+        "s": Direction.Up,
+        "a": Direction.Left,
+        "d": Direction.Right,
+        ".": Direction.Stand
+    }
+    BOMB_KEY = " "
+
+    def __init__(self, script):
+        for key in script:
+            if key not in self.DIRECTIONS and key != self.BOMB_KEY:
+                raise Exception("Unknown key in script: " + key)
+        self._script = script
+        self._tick = 0
+
+    def select_action(self):
+        key = self._script[self._tick % len(self._script)]
+        self._tick += 1
+        if key == self.BOMB_KEY:
+            return PutBomb(bomb_factory=self._player.get_bomb)
+        return Move.get(self.DIRECTIONS[key])
+
+
+class RandomController(PlayerController):
+
+    def __init__(self, seed=None, bomb_probability=0.02, turn_probability=0.1):
+        self._random = random.Random(seed)
+        self._bomb_probability = bomb_probability
+        self._turn_probability = turn_probability
+        self._direction = Direction.Stand
+
+    def select_action(self):
+        if self._random.random() < self._bomb_probability:
+            return PutBomb(bomb_factory=self._player.get_bomb)
+        if self._random.random() < self._turn_probability:
+            self._direction = self._random.choice(list(Direction))
+        return Move.get(self._direction)
+
+
+def create_game(level, controller, incremental=True,
+                instant_chain_reactions=False, explosion_field=False,
+                collision_cache=False, ecs_backend=False):
+    if level == "Random":
+        game_map = LevelCreator.create_random_level(RANDOM_LEVEL_SIZE,
+                                                    RANDOM_LEVEL_SIZE)
+    else:
+        with open(level) as f:
+            level_ = f.read().split('\n')
+        game_map, _, _ = LevelCreator(DEFAULT_LEGEND).create_level(level_)
+    player = Player(controller)
+    player.set_bomb_type(SimpleBomb)
+    game_map.add_map_object(player, Point(CELL_SIZE, CELL_SIZE))
+    if ecs_backend:
+        import ecs
+        return ecs.EcsGame(game_map)
+    return Game(game_map, player, incremental=incremental,
+                instant_chain_reactions=instant_chain_reactions,
+                explosion_field=explosion_field,
+                collision_cache=collision_cache)
+
+
+def run(game, ticks, frame=None):
+    start = time.perf_counter()
+    if frame is not None:
+        for _ in range(ticks):
+            game.make_frame(frame)
+    else:
+        for _ in range(ticks):
+            game.make_turn()
+    return time.perf_counter() - start
+
+
+def create_controller(args):
+    if args.script is not None:
+        return ScriptedController(args.script)
+    if args.controller == "random":
+        return RandomController(args.seed)
+    return IdleController()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the game without graphics as fast as possible")
+    parser.add_argument("level", nargs="?", default="Random",
+                        help="path to a level file or Random")
+    parser.add_argument("-n", "--ticks", type=int, default=DEFAULT_TICKS)
+    parser.add_argument("-c", "--controller", choices=("idle", "random"),
+                        default="random")
+    parser.add_argument("-s", "--script",
+                        help="keys replayed in a loop: wsad to move, "
+                             "'.' to stand, space to put a bomb")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--rebuild", action="store_true",
+                        help="rebuild the map every tick instead of "
+                             "updating it incrementally")
+    parser.add_argument("--instant-chains", action="store_true",
+                        help="detonate whole bomb chains in a single tick")
+    parser.add_argument("--explosion-field", action="store_true",
+                        help="keep explosions in a compact grid instead of "
+                             "map objects")
+    parser.add_argument("--collision-cache", action="store_true",
+                        help="memoize collision queries within a tick and "
+                             "report hits and misses")
+    parser.add_argument("--frames", action="store_true",
+                        help="build a struct-of-arrays frame every tick")
+    parser.add_argument("--ecs", action="store_true",
+                        help="run the NumPy entity-component backend")
+    args = parser.parse_args()
+    if args.ecs and (args.rebuild or args.instant_chains or
+                     args.explosion_field or args.collision_cache):
+        parser.error("--ecs cannot be combined with --rebuild, "
+                     "--instant-chains, --explosion-field or "
+                     "--collision-cache")
+
+    random.seed(args.seed)
+    game = create_game(args.level, create_controller(args),
+                       incremental=not args.rebuild,
+                       instant_chain_reactions=args.instant_chains,
+                       explosion_field=args.explosion_field,
+                       collision_cache=args.collision_cache,
+                       ecs_backend=args.ecs)
+    seconds = run(game, args.ticks,
+                  FrameBuffer() if args.frames else None)
+    print("ticks: {}".format(args.ticks))
+    print("seconds: {:.3f}".format(seconds))
+    print("ticks/sec: {:.1f}".format(args.ticks / seconds))
+    for category, count in game.stats.items():
+        print("{}: {}".format(category, count))
+    if args.collision_cache:
+        for name, count in game.collision_cache_stats.items():
+            print("collision cache {}: {}".format(name, count))
+    print("player dead: {}".format(game.player.is_dead))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,22 @@
 #!/usr/bin/python3
 
 import unittest
+import collections
+import copy
+import os
+import random
+import sys
+import time
+import tracemalloc
 from logic import *
 import child_classes
 import level_creator
+import sim
 from controller import *
+try:
+    import ecs
+except ImportError:
+    ecs = None
 
 
 class GoRightController(PlayerController):
@@ -37,6 +49,54 @@ class EmptyGameController(GameController):
         return Move(Direction.Up)
 
 
+class ScriptedController(PlayerController):
+
+    def __init__(self, actions):
+        self._actions = actions
+        self._tick = 0
+
+    def select_action(self):
+        action = self._actions[self._tick % len(self._actions)]
+        self._tick += 1
+        return action()
+
+
+def create_scripted_game(incremental, explosion_field=False,
+                         collision_cache=False):
+    legend = {
+        '#': lambda: (child_classes.UnbreakableBlock(),),
+        'H': lambda: (child_classes.DestroyableBlock(),),
+        'I': lambda: (child_classes.ImmuneBonus(),
+                      child_classes.DestroyableBlock()),
+        'i': lambda: (child_classes.ImmuneBonus(),),
+        'C': lambda: (child_classes.CleverMonster(),),
+        'F': lambda: (child_classes.FortifiedBlock(),)
+    }
+    game_map, _, _ = level_creator.LevelCreator(legend).create_level([
+        "###########",
+        "#  H   I  #",
+        "# # # #H# #",
+        "#  i   C  #",
+        "# #H# # # #",
+        "#   IH   F#",
+        "###########"
+    ])
+    actions = [lambda: PutBomb(Bomb(70, 3))] + \
+        [lambda: Move(Direction.Up)] * (CELL_SIZE * 2) + \
+        [lambda: Move(Direction.Right)] * (CELL_SIZE * 2) + \
+        [lambda: Move(Direction.Stand)] * 40
+    player = Player(ScriptedController(actions))
+    game_map.add_map_object(player, Point(CELL_SIZE, CELL_SIZE))
+    return Game(game_map, player, incremental=incremental,
+                explosion_field=explosion_field,
+                collision_cache=collision_cache)
+
+
+def get_snapshot(game_map):
+    return sorted((type(game_object).__name__, point.x, point.y)
+                  for point, game_object in game_map.enumerate_all_objects())
+
+
 class MovementTests(unittest.TestCase):
 
     def setUp(self):
@@ -74,6 +134,63 @@ class MovementTests(unittest.TestCase):
         self.assertEqual(set(), self.game.map.occupied_cells)
 
 
+class ListMovePlayer(Player):
+
+    def get_blocking_mask(self, coordinates, old_map):
+        return None
+
+
+class ListMoveMonster(child_classes.SimpleMonster):
+
+    def get_blocking_mask(self, coordinates, old_map):
+        return None
+
+
+class StrongWalker(child_classes.StrongMonster):
+
+    def move(self, coordinates, old_map):
+        return Move(Direction.Down)
+
+
+class CornerSlideTests(unittest.TestCase):
+
+    def get_move_result(self, game_object, game_map, point, direction):
+        changes = MapChanges()
+        animation, = Move(direction).change_game_state(
+            game_object, point, game_map, changes)
+        return changes.added[0][1], animation.direction
+
+    def test_grid_moves_match_collision_lists(self):
+        rand = random.Random(17)
+        game_map = create_arena(8)
+        for _ in range(12):
+            game_map.add_map_object(
+                rand.choice([Block, child_classes.ImmuneBonus,
+                             lambda: Bomb(10, 2)])(),
+                Point(rand.randrange(1, 7) * CELL_SIZE,
+                      rand.randrange(1, 7) * CELL_SIZE))
+        bomb = Bomb(10, 2)
+        game_map.add_map_object(bomb, Point(CELL_SIZE * 3, CELL_SIZE * 3))
+        for _ in range(300):
+            point = Point(rand.randrange(CELL_SIZE, CELL_SIZE * 7),
+                          rand.randrange(CELL_SIZE, CELL_SIZE * 7))
+            direction = rand.choice(list(Direction))
+            pairs = [(Player(GoRightController()),
+                      ListMovePlayer(GoRightController())),
+                     (child_classes.SimpleMonster(), ListMoveMonster())]
+            pairs[0][0].set_last_bomb(bomb)
+            pairs[0][1].set_last_bomb(bomb)
+            if rand.random() < 0.2:
+                pairs[0][0].set_ghost_mode(True)
+                pairs[0][1].set_ghost_mode(True)
+            for grid_object, list_object in pairs:
+                self.assertEqual(
+                    self.get_move_result(list_object, game_map, point,
+                                         direction),
+                    self.get_move_result(grid_object, game_map, point,
+                                         direction))
+
+
 class PlayerCollisionTests(unittest.TestCase):
 
     def setUp(self):
@@ -188,6 +305,1088 @@ class BombAndExplosionTests(unittest.TestCase):
         self.assertIn(self.player, self.game._map._objects[Point(0, 0)])
 
 
+class ChainReactionTests(unittest.TestCase):
+
+    def create_chain_game(self, length, instant_chain_reactions):
+        game_map = Map()
+        bombs = [Bomb(1 if i == 0 else 100, 3) for i in range(length)]
+        for i, bomb in enumerate(bombs):
+            game_map.add_map_object(bomb, Point(i * 2 * CELL_SIZE, 0))
+        player = Player(GoRightController())
+        game = Game(game_map, player, incremental=True,
+                    instant_chain_reactions=instant_chain_reactions)
+        return game, bombs
+
+    def test_staggered_chain_takes_a_tick_per_bomb(self):
+        game, bombs = self.create_chain_game(5, False)
+        for tick in range(5):
+            game.make_turn()
+            self.assertEqual(5 - tick - 1, game.stats["bombs"])
+
+    def test_instant_chain_explodes_in_one_tick(self):
+        game, bombs = self.create_chain_game(5, True)
+        game.make_turn()
+        self.assertEqual(0, game.stats["bombs"])
+
+    def test_instant_chain_places_same_explosions(self):
+        staggered_game, _ = self.create_chain_game(4, False)
+        instant_game, _ = self.create_chain_game(4, True)
+        for _ in range(4):
+            staggered_game.make_turn()
+        instant_game.make_turn()
+        self.assertEqual(set(staggered_game.map.occupied_cells),
+                         set(instant_game.map.occupied_cells))
+        self.assertEqual(staggered_game.stats, instant_game.stats)
+
+    def test_high_powered_rays_do_not_trigger_bombs(self):
+        game_map = Map()
+        bomb = child_classes.HighPowerBomb(1, 3)
+        other_bomb = Bomb(100, 3)
+        game_map.add_map_object(bomb, Point(0, 0))
+        game_map.add_map_object(other_bomb, Point(2 * CELL_SIZE, 0))
+        game = Game(game_map, Player(GoRightController()),
+                    instant_chain_reactions=True)
+        game.make_turn()
+        self.assertEqual(1, game.stats["bombs"])
+
+
+class ExplosionFieldTests(unittest.TestCase):
+
+    def get_explosion_cells(self, game_map):
+        return {point for point, game_object
+                in game_map.enumerate_all_objects()
+                if isinstance(game_object, ExplosionBlock)}
+
+    def test_same_result_as_explosion_objects(self):
+        for incremental in (False, True):
+            object_game = create_scripted_game(incremental)
+            field_game = create_scripted_game(incremental,
+                                              explosion_field=True)
+            for _ in range(150):
+                object_game.make_turn()
+                field_game.make_turn()
+                self.assertEqual(
+                    [item for item in get_snapshot(object_game.map)
+                     if item[0] != "ExplosionBlock"],
+                    get_snapshot(field_game.map))
+                self.assertEqual(
+                    self.get_explosion_cells(object_game.map),
+                    {animation.location for animation
+                     in field_game.get_explosion_animations()
+                     if animation.object.life_time > 0})
+                self.assertEqual(object_game.stats, field_game.stats)
+
+    def test_explosion_animations(self):
+        game_map = Map()
+        game_map.add_map_object(child_classes.HighPowerBomb(1, 2),
+                                Point(-CELL_SIZE * 4, CELL_SIZE * 4))
+        game = Game(game_map, Player(GoRightController()),
+                    explosion_field=True)
+        game.make_turn()
+        animations = game.get_explosion_animations()
+        self.assertEqual(5, len(animations))
+        self.assertEqual({ExplosionBlock, child_classes.HighPoweredExplosion},
+                         {type(animation.object) for animation in animations})
+        self.assertTrue(all(animation.object.life_time == EXPLOSION_LIVE - 1
+                            for animation in animations))
+        self.assertEqual([], list(game.map.enumerate_all_objects()))
+        for _ in range(EXPLOSION_LIVE):
+            game.make_turn()
+        self.assertEqual([], game.get_explosion_animations())
+        self.assertEqual(0, game.stats["explosions"])
+
+    def test_field_kills_monsters_and_sets_off_bombs(self):
+        game_map = Map()
+        game_map.add_map_object(Bomb(1, 3), Point(0, 0))
+        monster = Monster()
+        other_bomb = Bomb(100, 3)
+        game_map.add_map_object(monster, Point(0, CELL_SIZE))
+        game_map.add_map_object(other_bomb, Point(CELL_SIZE * 2, 0))
+        game = Game(game_map, Player(GoRightController()),
+                    explosion_field=True)
+        game.make_turn()
+        self.assertTrue(monster.is_dead)
+        self.assertEqual(1, game.stats["bombs"])
+        game.make_turn()
+        self.assertEqual(0, game.stats["bombs"])
+
+    def create_overlap_game(self, objects, explosion_field):
+        game_map = Map()
+        for game_object, point in objects:
+            game_map.add_map_object(game_object, point)
+        return Game(game_map, Player(GoRightController()),
+                    explosion_field=explosion_field)
+
+    def test_overlapping_blasts_set_off_bombs(self):
+        for high_power_first in (False, True):
+            for explosion_field in (False, True):
+                bombs = [(Bomb(1, 3), Point(0, 0)),
+                         (child_classes.HighPowerBomb(1, 3),
+                          Point(CELL_SIZE * 4, 0))]
+                if high_power_first:
+                    bombs.reverse()
+                game = self.create_overlap_game(
+                    bombs + [(Bomb(100, 1), Point(CELL_SIZE * 2, 0))],
+                    explosion_field)
+                game.make_turn()
+                self.assertEqual(1, game.stats["bombs"])
+                game.make_turn()
+                self.assertEqual(0, game.stats["bombs"])
+
+    def test_overlapping_blasts_kill_strong_monster(self):
+        for high_power_first in (False, True):
+            results = []
+            for explosion_field in (False, True):
+                monster = StrongWalker()
+                bombs = [(child_classes.HighPowerBomb(1, 3), Point(0, 0)),
+                         (Bomb(2, 3), Point(CELL_SIZE * 4, 0))]
+                if high_power_first:
+                    bombs.reverse()
+                game = self.create_overlap_game(
+                    bombs + [(monster, Point(CELL_SIZE * 2, CELL_SIZE + 1))],
+                    explosion_field)
+                for _ in range(5):
+                    game.make_turn()
+                results.append(monster.is_dead)
+            self.assertEqual([True, True], results)
+
+
+class FrameBufferTests(unittest.TestCase):
+
+    def get_rows(self, animations):
+        return [(animation.object.frame_kind, animation.location.x,
+                 animation.location.y, animation.direction,
+                 animation.object.frame_state)
+                for animation in animations]
+
+    def test_frame_matches_animations(self):
+        for incremental in (False, True):
+            animation_game = create_scripted_game(incremental)
+            frame_game = create_scripted_game(incremental)
+            frame = FrameBuffer()
+            for _ in range(150):
+                animations = animation_game.make_turn()
+                self.assertIs(frame, frame_game.make_frame(frame))
+                self.assertEqual(len(animations), len(frame))
+                self.assertEqual(self.get_rows(animations),
+                                 list(frame.rows()))
+
+    def test_field_frame_matches_object_frame(self):
+        object_game = create_scripted_game(True)
+        field_game = create_scripted_game(True, explosion_field=True)
+        for _ in range(150):
+            object_rows = collections.Counter(object_game.make_frame().rows())
+            field_rows = collections.Counter(field_game.make_frame().rows())
+            self.assertEqual(collections.Counter(), object_rows - field_rows)
+            self.assertTrue(all(issubclass(row[0][0], ExplosionBlock)
+                                for row in field_rows - object_rows))
+
+    def test_kind_ids_are_stable(self):
+        frame = FrameBuffer()
+        block = Block()
+        frame.extend([Animation(block, Point(0, 0), Direction.Stand)])
+        frame.clear()
+        self.assertEqual(0, len(frame))
+        frame.extend([Animation(Monster(), Point(1, 2), Direction.Left),
+                      Animation(block, Point(3, 4), Direction.Stand)])
+        self.assertEqual([Block, Monster], frame.kinds)
+        self.assertEqual([1, 0], list(frame.kind_ids))
+        self.assertEqual([1, 3], list(frame.xs))
+        self.assertEqual([2, 4], list(frame.ys))
+        self.assertEqual([Direction.Left, Direction.Stand],
+                         [FrameBuffer.DIRECTIONS[code]
+                          for code in frame.directions])
+
+
+class EventStreamTests(unittest.TestCase):
+
+    def record(self, game, *event_types):
+        events = []
+        game.subscribe(events.append, *event_types)
+        return events
+
+    def test_both_game_modes_emit_same_events(self):
+        streams = []
+        for incremental in (False, True):
+            game = create_scripted_game(incremental)
+            events = self.record(game)
+            for _ in range(150):
+                game.make_turn()
+            streams.append([(type(event), getattr(event, "location", None))
+                            for event in events])
+        self.assertEqual(collections.Counter(streams[0]),
+                         collections.Counter(streams[1]))
+        types = [event_type for event_type, _ in streams[0]]
+        self.assertEqual((BombPlaced, Point(CELL_SIZE, CELL_SIZE)),
+                         streams[0][0])
+        for event_type in (ExplosionCells, ObjectDied, PlayerMoved,
+                           BonusPickedUp, BuffStarted):
+            self.assertIn(event_type, types)
+
+    def test_events_are_filtered_by_type(self):
+        game = create_scripted_game(True)
+        events = self.record(game, BombPlaced, ExplosionCells)
+        for _ in range(150):
+            game.make_turn()
+        self.assertEqual([BombPlaced, ExplosionCells],
+                         [type(event) for event in events])
+        self.assertEqual(Point(CELL_SIZE, CELL_SIZE), events[1].center)
+        center = events[1].center
+        self.assertTrue(events[1].rays)
+        self.assertTrue(all(point.x == center.x or point.y == center.y
+                            for point, _ in events[1].rays))
+
+    def test_no_subscribers_detach_stream(self):
+        game = create_scripted_game(True)
+        self.assertIsNone(game.map.events)
+        events = self.record(game)
+        game.make_turn()
+        self.assertIsNotNone(game.map.events)
+        game.unsubscribe(events.append)
+        self.assertIsNone(game.map.events)
+        for _ in range(10):
+            game.make_turn()
+        self.assertEqual(1, len(events))
+
+    def test_buff_end_is_reported(self):
+        game_map = Map()
+        player = Player(GoRightController())
+        game_map.add_map_object(player, Point(0, 0))
+        game = Game(game_map, player)
+        events = self.record(game, BuffStarted, BuffEnded)
+        buff = Buff()
+        buff.time = 3
+        player.add_buff(buff)
+        for _ in range(5):
+            game.make_turn()
+        self.assertEqual([BuffStarted, BuffEnded],
+                         [type(event) for event in events])
+        self.assertTrue(all(event.buff is buff and event.player is player
+                            for event in events))
+
+    def test_exploding_bombs_are_reported_dead(self):
+        for options in ({}, {"incremental": True},
+                        {"instant_chain_reactions": True},
+                        {"explosion_field": True}):
+            game_map = Map()
+            fuse_bomb = Bomb(2, 3)
+            chained_bomb = Bomb(100, 2)
+            game_map.add_map_object(fuse_bomb, Point(0, 0))
+            game_map.add_map_object(chained_bomb, Point(CELL_SIZE * 2, 0))
+            game = Game(game_map, Player(GoRightController()), **options)
+            events = self.record(game, ObjectDied)
+            for _ in range(4):
+                game.make_turn()
+            self.assertEqual(
+                [(fuse_bomb, Point(0, 0)),
+                 (chained_bomb, Point(CELL_SIZE * 2, 0))],
+                [(event.object, event.location) for event in events])
+
+
+class TimerWheelTests(unittest.TestCase):
+
+    def setUp(self):
+        self.timers = TimerWheel(size=8)
+        self.fired = []
+
+    def test_timer_fires_after_delay(self):
+        self.timers.schedule(3, self.fired.append, "bomb")
+        self.timers.schedule(20, self.fired.append, "buff")
+        for _ in range(19):
+            self.timers.advance()
+            if self.timers.now == 3:
+                self.assertEqual(["bomb"], self.fired)
+        self.assertEqual(["bomb"], self.fired)
+        self.timers.advance()
+        self.assertEqual(["bomb", "buff"], self.fired)
+
+    def test_cancelled_timer_does_not_fire(self):
+        timer = self.timers.schedule(2, self.fired.append, "bomb")
+        timer.cancel()
+        self.timers.advance()
+        self.timers.advance()
+        self.assertEqual([], self.fired)
+
+    def test_zero_delay_fires_immediately(self):
+        self.assertIsNone(self.timers.schedule(0, self.fired.append, "now"))
+        self.assertEqual(["now"], self.fired)
+
+    def test_bomb_fuse_and_explosion_life_time(self):
+        game_map = Map()
+        bomb = Bomb(3, 2)
+        game_map.add_map_object(bomb, Point(0, 0))
+        game = Game(game_map, Player(GoRightController()),
+                    incremental=True)
+        game.make_turn()
+        game.make_turn()
+        self.assertFalse(bomb.is_dead)
+        game.make_turn()
+        self.assertTrue(bomb.is_dead)
+        explosion = game.map.get_map_objects(Point(0, 0))[0]
+        self.assertEqual(EXPLOSION_LIVE - 1, explosion.life_time)
+        for _ in range(EXPLOSION_LIVE - 2):
+            game.make_turn()
+        self.assertEqual(1, explosion.life_time)
+        game.make_turn()
+        self.assertEqual([], game.map.get_map_objects(Point(0, 0)))
+
+    def test_copied_game_keeps_its_timers(self):
+        game = create_scripted_game(incremental=True)
+        for _ in range(5):
+            game.make_turn()
+        copied_game = copy.deepcopy(game)
+        for _ in range(100):
+            game.make_turn()
+            copied_game.make_turn()
+        self.assertEqual(get_snapshot(game.map),
+                         get_snapshot(copied_game.map))
+
+
+def create_arena(size):
+    game_map = Map()
+    for i in range(size):
+        for point in (Point(i * CELL_SIZE, 0),
+                      Point(i * CELL_SIZE, (size - 1) * CELL_SIZE),
+                      Point(0, i * CELL_SIZE),
+                      Point((size - 1) * CELL_SIZE, i * CELL_SIZE)):
+            if not game_map.get_map_objects(point):
+                game_map.add_map_object(child_classes.UnbreakableBlock(),
+                                        point)
+    return game_map
+
+
+def add_immune_player(game_map, controller, coordinates):
+    player = Player(controller)
+    immune_buff = child_classes.ImmuneBuff()
+    immune_buff.time = 10 ** 6
+    player.add_buff(immune_buff)
+    game_map.add_map_object(player, coordinates)
+    return Game(game_map, player, incremental=True)
+
+
+def create_crowded_level_scenario():
+    random.seed(0)
+    game_map = level_creator.LevelCreator.create_random_level(31, 31)
+    game = add_immune_player(game_map, sim.RandomController(0),
+                             Point(CELL_SIZE, CELL_SIZE))
+    game.player.set_bomb_type(child_classes.SimpleBomb)
+    return game
+
+
+def create_bomb_chain_scenario(bomb_count=50):
+    game_map = Map()
+    for i in range(bomb_count):
+        game_map.add_map_object(Bomb(1 if i == 0 else 10 ** 6, 3),
+                                Point(i * CELL_SIZE * 2, 0))
+    return add_immune_player(game_map, GoRightController(),
+                             Point(0, CELL_SIZE * 4))
+
+
+def create_clever_monsters_scenario(monster_count=200, size=19):
+    game_map = create_arena(size)
+    center = Point(size // 2 * CELL_SIZE, size // 2 * CELL_SIZE)
+    cells = [Point(x * CELL_SIZE, y * CELL_SIZE)
+             for x in range(1, size - 1) for y in range(1, size - 1)]
+    cells.remove(center)
+    random.Random(0).shuffle(cells)
+    for point in cells[:monster_count]:
+        game_map.add_map_object(child_classes.CleverMonster(), point)
+    return add_immune_player(game_map, GoLeftController(), center)
+
+
+def create_explosion_storm_scenario(bomb_count=100, size=40):
+    game_map = create_arena(size)
+    generator = random.Random(1)
+    for i in range(bomb_count):
+        point = Point(generator.randrange(1, size - 1) * CELL_SIZE,
+                      generator.randrange(1, size - 1) * CELL_SIZE)
+        if not game_map.get_map_objects(point):
+            game_map.add_map_object(child_classes.SimpleBomb(
+                1 + i % 20, child_classes.LONG_RANGE_EXPLOSION_RADIUS * 2
+            ), point)
+    return add_immune_player(game_map, GoDownController(),
+                             Point(CELL_SIZE, CELL_SIZE))
+
+
+class ScenarioBudgetTests(unittest.TestCase):
+
+    FRAME_BUDGET_SECONDS = 0.03
+
+    def check_budgets(self, create_scenario, ticks, seconds_per_tick,
+                      peak_memory_bytes):
+        game = create_scenario()
+        start = time.perf_counter()
+        for _ in range(ticks):
+            game.make_turn()
+        elapsed = (time.perf_counter() - start) / ticks
+        self.assertLess(elapsed, seconds_per_tick,
+                        "{} takes {:.1f} ms per tick".format(
+                            create_scenario.__name__, elapsed * 1000))
+
+        game = create_scenario()
+        tracemalloc.start()
+        try:
+            for _ in range(ticks):
+                game.make_turn()
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak_memory, peak_memory_bytes,
+                        "{} allocates {} bytes at peak".format(
+                            create_scenario.__name__, peak_memory))
+        return game
+
+    def test_crowded_level(self):
+        self.check_budgets(create_crowded_level_scenario, 100,
+                           self.FRAME_BUDGET_SECONDS, 4 * 2 ** 20)
+
+    def test_bomb_chain(self):
+        game = self.check_budgets(create_bomb_chain_scenario, 110,
+                                  self.FRAME_BUDGET_SECONDS, 2 ** 20)
+        self.assertEqual(0, len([bomb for _, bomb
+                                 in game.map.enumerate_all_objects()
+                                 if isinstance(bomb, Bomb)]))
+
+    def test_clever_monsters(self):
+        self.check_budgets(create_clever_monsters_scenario, 48,
+                           self.FRAME_BUDGET_SECONDS, 4 * 2 ** 20)
+
+    def test_explosion_storm(self):
+        self.check_budgets(create_explosion_storm_scenario, 60,
+                           self.FRAME_BUDGET_SECONDS, 8 * 2 ** 20)
+
+    def test_rebuilding_allocation_stays_flat(self):
+        scenario = create_crowded_level_scenario()
+        game = Game(scenario.map, scenario.player)
+        for _ in range(10):
+            game.make_turn()
+        tracemalloc.start()
+        try:
+            allocations = []
+            for _ in range(50):
+                start_memory, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                game.make_turn()
+                _, peak_memory = tracemalloc.get_traced_memory()
+                allocations.append(peak_memory - start_memory)
+            retained_memory, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(retained_memory, 2 ** 20)
+        first = sum(allocations[:15]) / 15
+        last = sum(allocations[-15:]) / 15
+        self.assertLess(last, first * 1.2)
+
+
+class IncrementalGameTests(unittest.TestCase):
+
+    def test_same_result_as_rebuilding_game(self):
+        rebuilding_game = create_scripted_game(incremental=False)
+        incremental_game = create_scripted_game(incremental=True)
+        for _ in range(150):
+            rebuilding_animations = rebuilding_game.make_turn()
+            incremental_animations = incremental_game.make_turn()
+            self.assertEqual(len(rebuilding_animations),
+                             len(incremental_animations))
+            self.assertEqual(get_snapshot(rebuilding_game.map),
+                             get_snapshot(incremental_game.map))
+
+    def test_buffers_are_swapped(self):
+        game = create_scripted_game(incremental=True)
+        first_map = game.map
+        game.make_turn()
+        second_map = game.map
+        game.make_turn()
+        self.assertIsNot(first_map, second_map)
+        self.assertIs(first_map, game.map)
+        self.assertEqual(get_snapshot(first_map), get_snapshot(second_map))
+
+    def test_static_objects_are_not_reinserted(self):
+        game = create_scripted_game(incremental=True)
+        game.make_turn()
+        version = game.map.version
+        game.make_turn()
+        game.make_turn()
+        self.assertLess(game.map.version - version, 10)
+
+    def test_external_changes_are_kept(self):
+        game = create_scripted_game(incremental=True)
+        game.make_turn()
+        block = Block()
+        game.map.add_map_object(block, Point(CELL_SIZE * 9, CELL_SIZE * 5))
+        game.make_turn()
+        game.make_turn()
+        self.assertIn(block, game.map.get_map_objects(
+            Point(CELL_SIZE * 9, CELL_SIZE * 5)))
+
+
+class ActiveSetTests(unittest.TestCase):
+
+    class CountingBlock(Block):
+
+        def __init__(self):
+            super().__init__()
+            self.move_count = 0
+            self.collision_count = 0
+
+        def move(self, coordinates, old_map):
+            self.move_count += 1
+            return super().move(coordinates, old_map)
+
+        def solve_collision(self, other_objects):
+            self.collision_count += 1
+
+    def setUp(self):
+        self.map = Map()
+        self.player = Player(GoRightController())
+        self.map.add_map_object(self.player, Point(0, 0))
+        self.near_block = self.CountingBlock()
+        self.far_block = self.CountingBlock()
+        self.map.add_map_object(self.near_block, Point(0, 0))
+        self.map.add_map_object(self.far_block, Point(CELL_SIZE * 5, 0))
+
+    def test_dormant_objects_do_not_move(self):
+        for incremental in (False, True):
+            game = Game(self.map, self.player, incremental=incremental)
+            game.make_turn()
+            game.make_turn()
+        self.assertEqual(0, self.near_block.move_count)
+        self.assertEqual(0, self.far_block.move_count)
+
+    def test_only_touched_dormant_objects_solve_collisions(self):
+        for incremental in (False, True):
+            game = Game(self.map, self.player, incremental=incremental)
+            game.make_turn()
+        self.assertEqual(2, self.near_block.collision_count)
+        self.assertEqual(0, self.far_block.collision_count)
+
+    def test_dormant_objects_are_animated(self):
+        game = Game(self.map, self.player, incremental=True)
+        animations = game.make_turn()
+        self.assertEqual({self.player, self.near_block, self.far_block},
+                         {animation.object for animation in animations})
+
+    def test_dormant_animations_are_reused(self):
+        for incremental in (False, True):
+            game = Game(self.map.copy(), self.player, incremental=incremental)
+            game.make_turn()
+            game.make_turn()
+            animations = game.map.get_dormant_animations()
+            game.make_turn()
+            game.make_turn()
+            self.assertIs(animations, game.map.get_dormant_animations())
+            block = Block()
+            game.map.add_map_object(block, Point(0, CELL_SIZE * 5))
+            self.assertIn(block, {animation.object
+                                  for animation in game.make_turn()})
+
+    def test_contacts_match_brute_force(self):
+        rand = random.Random(18)
+        game_map = Map()
+        for _ in range(150):
+            game_object = rand.choice([Block, Monster,
+                                       child_classes.ImmuneBonus])()
+            game_map.add_map_object(game_object, Point(
+                rand.randint(-80, 80), rand.randint(-80, 80)))
+        contacts, touched_cells = Game._find_contacts(game_map)
+        occupied = game_map.occupied_cells
+        expected_touched = set()
+        for point in game_map.active_points:
+            expected = {other for other in occupied
+                        if Map.are_intersected(point, other)}
+            self.assertEqual(expected, contacts[point])
+            expected_touched.update(other for other in expected
+                                    if game_map.has_dormant_objects(other))
+        self.assertEqual(expected_touched, touched_cells)
+
+    def test_isolated_objects_skip_solve_collision(self):
+        class CountingMonster(Monster):
+            collision_count = 0
+
+            def solve_collision(self, other_objects):
+                CountingMonster.collision_count += 1
+
+        self.map.add_map_object(CountingMonster(), Point(CELL_SIZE * 9, 0))
+        self.map.add_map_object(CountingMonster(), Point(0, CELL_SIZE * 9))
+        self.map.add_map_object(CountingMonster(),
+                                Point(CELL_SIZE // 2, CELL_SIZE * 9))
+        game = Game(self.map, self.player, incremental=True)
+        game.make_turn()
+        self.assertEqual(2, CountingMonster.collision_count)
+
+    def test_enumerate_objects_by_activity(self):
+        self.assertEqual([(Point(0, 0), self.player)],
+                         list(self.map.enumerate_active_objects()))
+        self.assertEqual({self.near_block, self.far_block},
+                         {game_object for _, game_object
+                          in self.map.enumerate_dormant_objects()})
+
+
+def create_ecs_scenario(seed, size=15, with_player=False):
+    generator = random.Random(seed)
+    game_map = Map()
+    free_cells = []
+    for x in range(size):
+        for y in range(size):
+            point = Point(x * CELL_SIZE, y * CELL_SIZE)
+            roll = generator.random()
+            if x in (0, size - 1) or y in (0, size - 1) or roll < 0.05:
+                game_map.add_map_object(child_classes.UnbreakableBlock(),
+                                        point)
+            elif roll < 0.15:
+                game_map.add_map_object(child_classes.DestroyableBlock(),
+                                        point)
+            elif roll < 0.2:
+                game_map.add_map_object(child_classes.FortifiedBlock(), point)
+            elif roll < 0.23:
+                game_map.add_map_object(child_classes.ImmuneBonus(), point)
+            elif roll < 0.38:
+                bomb_type = generator.choice((child_classes.SimpleBomb,
+                                              child_classes.HighPowerBomb))
+                game_map.add_map_object(bomb_type(generator.randint(1, 60),
+                                                  generator.randint(1, 5)),
+                                        point)
+            elif roll < 0.42:
+                game_map.add_map_object(Monster(), point)
+            elif roll < 0.44:
+                game_map.add_map_object(
+                    ExplosionBlock(generator.randint(1, 12)), point)
+            else:
+                free_cells.append(point)
+    monster_type = generator.choice((child_classes.SimpleMonster,
+                                     child_classes.StrongMonster))
+    game_map.add_map_object(monster_type(), generator.choice(free_cells))
+    if with_player:
+        generator.shuffle(free_cells)
+        game_map.add_map_object(child_classes.CleverMonster(), free_cells[0])
+        game_map.add_map_object(child_classes.LongExplosionBonus(),
+                                free_cells[1])
+        game_map.add_map_object(child_classes.HighBombBonus(), free_cells[2])
+        player = Player(sim.RandomController(seed, bomb_probability=0.05))
+        game_map.add_map_object(player, free_cells[3])
+    return game_map
+
+
+@unittest.skipIf(ecs is None, "numpy is not installed")
+class EcsGameTests(unittest.TestCase):
+
+    def get_states(self, game, ticks, get_objects):
+        states = []
+        for _ in range(ticks):
+            frame = game.make_frame()
+            states.append((
+                sorted((type_.__name__, point.x, point.y)
+                       for type_, point in get_objects(game)),
+                collections.Counter(frame.rows()),
+                game.stats
+            ))
+        return states
+
+    def test_same_result_as_object_engine(self):
+        for seed in range(5):
+            for incremental in (False, True):
+                random.seed(seed)
+                game = Game(create_ecs_scenario(seed),
+                            Player(GoRightController()),
+                            incremental=incremental)
+                expected = self.get_states(game, 120, lambda game: (
+                    (type(game_object), point) for point, game_object
+                    in game.map.enumerate_all_objects()))
+                random.seed(seed)
+                ecs_game = ecs.EcsGame(create_ecs_scenario(seed))
+                actual = self.get_states(ecs_game, 120, lambda game:
+                                         game.enumerate_objects())
+                for tick, (expected_state, actual_state) in \
+                        enumerate(zip(expected, actual)):
+                    self.assertEqual(expected_state, actual_state,
+                                     "seed {}, tick {}".format(seed, tick))
+
+    def test_random_player_matches_object_engine(self):
+        for seed in range(5):
+            random.seed(seed)
+            game_map = create_ecs_scenario(seed, with_player=True)
+            _, player = next(game_map.enumerate_objects("players"))
+            game = Game(game_map, player)
+            expected = self.get_states(game, 120, lambda game: (
+                (type(game_object), point) for point, game_object
+                in game.map.enumerate_all_objects()))
+            random.seed(seed)
+            ecs_game = ecs.EcsGame(create_ecs_scenario(seed, with_player=True))
+            actual = self.get_states(ecs_game, 120, lambda game:
+                                     game.enumerate_objects())
+            for tick, (expected_state, actual_state) in \
+                    enumerate(zip(expected, actual)):
+                self.assertEqual(expected_state, actual_state,
+                                 "seed {}, tick {}".format(seed, tick))
+            self.assertEqual(game.player.is_dead, ecs_game.player.is_dead)
+
+    def test_player_and_clever_monster_match_object_engine(self):
+        for incremental in (False, True):
+            game = create_scripted_game(incremental)
+            expected = self.get_states(game, 150, lambda game: (
+                (type(game_object), point) for point, game_object
+                in game.map.enumerate_all_objects()))
+            ecs_game = ecs.EcsGame(create_scripted_game(False).map)
+            actual = self.get_states(ecs_game, 150, lambda game:
+                                     game.enumerate_objects())
+            for tick, (expected_state, actual_state) in \
+                    enumerate(zip(expected, actual)):
+                self.assertEqual(expected_state, actual_state,
+                                 "tick {}".format(tick))
+            self.assertEqual((game.player.is_dead, game.player.immune),
+                             (ecs_game.player.is_dead, ecs_game.player.immune))
+
+    def test_conversion_keeps_lit_fuses(self):
+        for seed in range(5):
+            games = []
+            for _ in range(2):
+                random.seed(seed)
+                game = Game(create_ecs_scenario(seed),
+                            Player(GoRightController()))
+                for _ in range(30):
+                    game.make_turn()
+                games.append(game)
+            state = random.getstate()
+            expected = self.get_states(games[0], 90, lambda game: (
+                (type(game_object), point) for point, game_object
+                in game.map.enumerate_all_objects()))
+            random.setstate(state)
+            ecs_game = ecs.EcsGame(games[1].map)
+            actual = self.get_states(ecs_game, 90, lambda game:
+                                     game.enumerate_objects())
+            for tick, (expected_state, actual_state) in \
+                    enumerate(zip(expected, actual)):
+                self.assertEqual(expected_state, actual_state,
+                                 "seed {}, tick {}".format(seed, tick))
+
+    def test_unsupported_objects(self):
+        game_map = Map()
+        game_map.add_map_object(Player(GoRightController()), Point(0, 0))
+        game_map.add_map_object(Player(GoRightController()),
+                                Point(CELL_SIZE * 2, 0))
+        with self.assertRaises(ecs.UnsupportedObjectException):
+            ecs.EcsGame(game_map)
+        game_map = Map()
+        game_map.add_map_object(ListMoveMonster(), Point(0, 0))
+        with self.assertRaises(ecs.UnsupportedObjectException):
+            ecs.EcsGame(game_map)
+        game_map = Map()
+        game_map.add_map_object(Block(), Point(1, 0))
+        with self.assertRaises(ecs.UnsupportedObjectException):
+            ecs.EcsGame(game_map)
+
+
+class SimulationTests(unittest.TestCase):
+
+    LEVEL = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "levels", "levels", "Level 1")
+
+    def test_does_not_import_qt(self):
+        self.assertNotIn("PyQt5", sys.modules)
+
+    def test_run_level(self):
+        game = sim.create_game(self.LEVEL, sim.IdleController())
+        monster_count = game.monster_count
+        self.assertGreater(monster_count, 0)
+        sim.run(game, 20)
+        self.assertEqual(child_classes.SimpleBomb,
+                         type(game.player.get_bomb()))
+
+    @unittest.skipIf(ecs is None, "numpy is not installed")
+    def test_run_level_on_ecs_backend(self):
+        game = sim.create_game(self.LEVEL, sim.ScriptedController("dd  ss"),
+                               ecs_backend=True)
+        self.assertIsInstance(game, ecs.EcsGame)
+        self.assertGreater(game.monster_count, 0)
+        sim.run(game, 40, FrameBuffer())
+        self.assertEqual(40, game.now)
+        self.assertGreater(game.stats["explosions"] + game.stats["bombs"], 0)
+
+    def test_scripted_controller(self):
+        controller = sim.ScriptedController("d s")
+        player = Player(controller)
+        self.assertEqual(Direction.Right, controller.select_action().direction)
+        self.assertEqual(type(player.get_bomb()),
+                         type(controller.select_action().bomb))
+        self.assertEqual(Direction.Up, controller.select_action().direction)
+        self.assertEqual(Direction.Right, controller.select_action().direction)
+        with self.assertRaises(Exception):
+            sim.ScriptedController("x")
+
+
+class PointTests(unittest.TestCase):
+
+    def test_arithmetic(self):
+        point = Point(3, 5)
+        self.assertEqual(Point(4, 5), point + Direction.Right.value)
+        self.assertEqual(Point(3, 4), point - Direction.Up.value)
+        self.assertEqual(Point(6, 10), 2 * point)
+        self.assertEqual(Point(6, 10), point * 2)
+        self.assertEqual(Point(1, 7), point.translate(-2, 2))
+        self.assertEqual(Point, type(point + point))
+
+    def test_hash_and_equality(self):
+        cells = {Point(CELL_SIZE, 0): "cell"}
+        self.assertEqual("cell", cells[Point(CELL_SIZE, 0)])
+        self.assertEqual(Direction.Up, Direction(Point(0, 1)))
+        self.assertNotEqual(Point(0, 1), Point(1, 0))
+
+    def test_intern(self):
+        point = Point.intern(CELL_SIZE, CELL_SIZE * 2)
+        self.assertIs(point, Point.intern(CELL_SIZE, CELL_SIZE * 2))
+        self.assertIs(point, Map.round_point(Point(CELL_SIZE + 1,
+                                                   CELL_SIZE * 2 - 1),
+                                             CELL_SIZE))
+
+    def test_copy(self):
+        point = Point(7, 9)
+        copied_point = copy.deepcopy(point)
+        self.assertEqual(point, copied_point)
+        self.assertEqual(Point, type(copied_point))
+        self.assertEqual(9, copied_point.y)
+
+
+class MapTests(unittest.TestCase):
+
+    def setUp(self):
+        self.map = Map()
+
+    def test_collisions_match_brute_force(self):
+        points = [Point(x, y)
+                  for x in range(-40, 41, 7)
+                  for y in range(-33, 34, 11)]
+        for point in points:
+            self.map.add_map_object(Block(), point)
+        for x in range(-50, 51, 5):
+            for y in range(-50, 51, 5):
+                query = Point(x, y)
+                expected = {point for point in points
+                            if Map.are_intersected(query, point)}
+                self.assertEqual(expected, set(
+                    self.map.get_intersected_cells(query)))
+                self.assertEqual(len(expected),
+                                 len(self.map.get_collisions(query)))
+
+    def test_queries_touch_at_most_four_buckets(self):
+        self.assertEqual(((0, 0),), Map.get_grid_cells(Point(0, 0)))
+        self.assertEqual([(1, 0), (2, 0)],
+                         Map.get_grid_cells(Point(CELL_SIZE + 3, 0)))
+        self.assertEqual([(-1, 0), (-1, 1), (0, 0), (0, 1)],
+                         Map.get_grid_cells(Point(-3, 5)))
+        points = [Point(x, y) for x in range(-20, 21, 5)
+                  for y in range(-20, 21, 5)]
+        for point in points:
+            self.map.add_map_object(Block(), point)
+        for point in points[::2]:
+            self.map.remove_map_object(
+                self.map.get_map_objects(point)[0], point)
+        remaining = points[1::2]
+        for x in range(-30, 31, 3):
+            for y in range(-30, 31, 3):
+                query = Point(x, y)
+                self.assertEqual(
+                    {point for point in remaining
+                     if Map.are_intersected(query, point)},
+                    set(self.map.get_intersected_cells(query)))
+
+    def test_remove_map_object(self):
+        block = Block()
+        self.map.add_map_object(block, Point(3, 5))
+        self.map.remove_map_object(block, Point(3, 5))
+        self.assertEqual(set(), self.map.occupied_cells)
+        self.assertEqual([], self.map.get_collisions(Point(3, 5)))
+        with self.assertRaises(ValueError):
+            self.map.remove_map_object(block, Point(3, 5))
+
+    def test_category_counters(self):
+        monster = child_classes.CleverMonster()
+        self.map.add_map_object(monster, Point(0, 0))
+        self.map.add_map_object(child_classes.ImmuneBonus(), Point(0, 0))
+        self.map.add_map_object(child_classes.HighPoweredExplosion(1),
+                                Point(CELL_SIZE, 0))
+        self.assertEqual(1, self.map.count("monsters"))
+        self.assertEqual({"players": 0, "monsters": 1, "blocks": 0,
+                          "bombs": 0, "explosions": 1, "bonuses": 1},
+                         self.map.stats)
+        self.map.remove_map_object(monster, Point(0, 0))
+        self.assertEqual(0, self.map.count("monsters"))
+
+    def test_monster_count_follows_deaths(self):
+        player = Player(GoRightController())
+        self.map.add_map_object(player, Point(0, 0))
+        self.map.add_map_object(Monster(), Point(CELL_SIZE * 3, 0))
+        self.map.add_map_object(Monster(), Point(CELL_SIZE * 5, 0))
+        self.map.add_map_object(ExplosionBlock(5), Point(CELL_SIZE * 5, 0))
+        for incremental in (False, True):
+            game = Game(self.map, player, incremental=incremental)
+            self.assertEqual(2, game.monster_count)
+            game.make_turn()
+            self.assertEqual(1, game.monster_count)
+            self.assertEqual(1, game.stats["explosions"])
+
+    def test_has_collision_matches_collision_list(self):
+        types = [Block, Bomb, Bonus, Monster, Player,
+                 child_classes.FortifiedBlock]
+        rand = random.Random(11)
+        objects = []
+        for _ in range(60):
+            game_object = rand.choice(
+                [Block, child_classes.FortifiedBlock, Monster,
+                 child_classes.ImmuneBonus,
+                 lambda: child_classes.SimpleBomb(TIME_EXPLOSION_DELAY,
+                                                  START_EXPLOSION_RADIUS)])()
+            point = Point(rand.randint(-40, 40), rand.randint(-40, 40))
+            self.map.add_map_object(game_object, point)
+            objects.append((game_object, point))
+        for game_object, point in objects[::3]:
+            self.map.remove_map_object(game_object, point)
+        for x in range(-50, 51, 5):
+            for y in range(-50, 51, 5):
+                query = Point(x, y)
+                collisions = self.map.get_collisions(query)
+                for type_ in types:
+                    self.assertEqual(
+                        any(isinstance(obj, type_) for obj in collisions),
+                        self.map.has_collision(query, [type_]))
+
+    def test_categories_follow_class_hierarchy(self):
+        explosion = child_classes.HighPoweredExplosion(1)
+        self.assertTrue(explosion.category & EXPLOSION)
+        self.assertTrue(explosion.category &
+                        HIGH_POWERED_EXPLOSION)
+        self.assertFalse(ExplosionBlock(1).category &
+                         HIGH_POWERED_EXPLOSION)
+        self.assertEqual(MONSTER, child_classes.StrongMonster.category)
+        self.assertEqual(BONUS, child_classes.ImmuneBonus.category)
+
+    def test_collision_mask_matches_collision_list(self):
+        rand = random.Random(12)
+        objects = []
+        for _ in range(60):
+            game_object = rand.choice(
+                [Block, Monster, child_classes.ImmuneBonus,
+                 lambda: child_classes.HighPoweredExplosion(1)])()
+            point = Point(rand.randint(-40, 40), rand.randint(-40, 40))
+            self.map.add_map_object(game_object, point)
+            objects.append((game_object, point))
+        for game_object, point in objects[::3]:
+            self.map.remove_map_object(game_object, point)
+        for x in range(-50, 51, 5):
+            for y in range(-50, 51, 5):
+                query = Point(x, y)
+                collisions = self.map.get_collisions(query)
+                self.assertEqual(get_category_mask(collisions),
+                                 self.map.get_collision_mask(query))
+
+    def test_blocker_distance_matches_cell_scan(self):
+        rand = random.Random(15)
+        objects = []
+        for _ in range(80):
+            game_object = rand.choice([Block, Monster,
+                                       child_classes.ImmuneBonus])()
+            point = Point(rand.randint(-100, 100), rand.randint(-100, 100))
+            self.map.add_map_object(game_object, point)
+            objects.append((game_object, point))
+        for game_object, point in objects[::4]:
+            self.map.remove_map_object(game_object, point)
+        for x in range(-100, 101, 8):
+            for y in range(-100, 101, 8):
+                center = Point(x, y)
+                for direction in (Direction.Right, Direction.Left,
+                                  Direction.Up, Direction.Down):
+                    expected = None
+                    for i in range(1, 6):
+                        cell = center + direction.value * CELL_SIZE * i
+                        if self.map.get_collision_mask(cell) & \
+                                EXPLOSION_STOP_MASK:
+                            expected = i
+                            break
+                    self.assertEqual(expected, self.map.get_blocker_distance(
+                        center, direction, 5))
+
+    def test_collision_cache_counts_and_invalidates(self):
+        block = Block()
+        self.map.add_map_object(block, Point(0, 0))
+        self.map.enable_collision_cache()
+        self.assertEqual([block], self.map.get_collisions(Point(3, 3)))
+        self.assertEqual([block], self.map.get_collisions(Point(3, 3)))
+        self.assertEqual({"hits": 1, "misses": 1}, self.map.collision_stats)
+        monster = Monster()
+        self.map.add_map_object(monster, Point(5, 5))
+        self.assertEqual({block, monster},
+                         set(self.map.get_collisions(Point(3, 3))))
+        self.assertEqual({"hits": 1, "misses": 2}, self.map.collision_stats)
+
+    def test_collision_cache_does_not_change_game(self):
+        for incremental in (False, True):
+            game = create_scripted_game(incremental)
+            cached_game = create_scripted_game(incremental,
+                                               collision_cache=True)
+            for _ in range(150):
+                game.make_turn()
+                cached_game.make_turn()
+                self.assertEqual(get_snapshot(game.map),
+                                 get_snapshot(cached_game.map))
+            stats = cached_game.collision_cache_stats
+            self.assertGreater(stats["hits"] + stats["misses"], 0)
+
+    def test_clear_reuses_map(self):
+        block = Block()
+        self.map.add_map_object(block, Point(0, 0))
+        self.map.add_map_object(Monster(), Point(CELL_SIZE, 0))
+        version = self.map.version
+        self.map.clear()
+        self.assertLess(version, self.map.version)
+        self.assertEqual(set(), self.map.occupied_cells)
+        self.assertEqual([], self.map.get_collisions(Point(0, 0)))
+        self.assertEqual(0, self.map.count("monsters"))
+        self.assertEqual(None, self.map.get_blocker_distance(
+            Point(-CELL_SIZE, 0), Direction.Right, 5))
+        self.map.add_map_object(block, Point(0, CELL_SIZE))
+        self.assertEqual([block], self.map.get_collisions(Point(0, CELL_SIZE)))
+        self.assertEqual([(Point(0, CELL_SIZE), block)],
+                         list(self.map.enumerate_dormant_objects()))
+
+    def test_enumerate_objects_by_category(self):
+        monster = child_classes.CleverMonster()
+        block = Block()
+        self.map.add_map_object(monster, Point(0, 0))
+        self.map.add_map_object(block, Point(0, 0))
+        self.map.add_map_object(Monster(), Point(CELL_SIZE, 0))
+        self.assertEqual(2, len(list(self.map.enumerate_objects("monsters"))))
+        self.assertEqual([(Point(0, 0), block)],
+                         list(self.map.enumerate_objects("blocks")))
+        self.map.remove_map_object(monster, Point(0, 0))
+        self.assertEqual([Point(CELL_SIZE, 0)],
+                         [point for point, _ in
+                          self.map.enumerate_objects("monsters")])
+
+    def test_category_index_holds_only_matching_points(self):
+        bomb = Bomb(10, 2)
+        for x in range(20):
+            self.map.add_map_object(Block(), Point(x * CELL_SIZE, 0))
+        self.map.add_map_object(bomb, Point(0, CELL_SIZE))
+        self.assertEqual({Point(0, CELL_SIZE)},
+                         set(self.map._category_cells["bombs"]))
+        self.assertEqual([(Point(0, CELL_SIZE), bomb)],
+                         list(self.map.enumerate_objects("bombs")))
+        self.map.remove_map_object(bomb, Point(0, CELL_SIZE))
+        self.assertEqual([], list(self.map.enumerate_objects("bombs")))
+        self.map.clear()
+        self.assertEqual([], list(self.map.enumerate_objects("blocks")))
+        self.assertFalse(self.map._category_cells["blocks"])
+
+    def test_collisions_of_cell_aligned_point(self):
+        block = Block()
+        self.map.add_map_object(block, Point(CELL_SIZE, 0))
+        self.assertEqual([block], self.map.get_collisions(
+            Point(CELL_SIZE * 2 - 1, 0)))
+        self.assertEqual([], self.map.get_collisions(
+            Point(CELL_SIZE * 2, 0)))
+        self.assertEqual([], self.map.get_collisions(
+            Point(CELL_SIZE, -CELL_SIZE)))
+
+
 class OtherTests(unittest.TestCase):
 
     def setUp(self):
@@ -223,6 +1422,60 @@ class OtherTests(unittest.TestCase):
         self.assertIn(Player, map(type, (anim.object for anim in animations)))
         self.assertIn(Block, map(type, (anim.object for anim in animations)))
 
+    def test_moves_are_shared(self):
+        self.assertIs(Move.get(Direction.Left), Move.get(Direction.Left))
+        self.assertIsNot(Move.get(Direction.Left), Move.get(Direction.Up))
+
+    def test_bomb_is_created_only_when_placed(self):
+        created = []
+
+        def factory():
+            created.append(Bomb(1, 5))
+            return created[-1]
+
+        self.map.add_map_object(self.player, Point(32, 32))
+        self.map.add_map_object(Block(), Point(32, 32))
+        PutBomb(bomb_factory=factory).change_game_state(
+            self.player, Point(32, 32), self.map, Map())
+        self.assertEqual([], created)
+        old_map = Map()
+        old_map.add_map_object(self.player, Point(0, 0))
+        action = PutBomb(bomb_factory=factory)
+        action.change_game_state(self.player, Point(0, 0), old_map, Map())
+        self.assertEqual(1, len(created))
+        self.assertIs(created[0], action.bomb)
+
+    def test_idle_animation_is_reused(self):
+        block = Block()
+        self.map.add_map_object(block, Point(32, 32))
+        first = [anim for anim in self.game.make_turn()
+                 if anim.object is block]
+        second = [anim for anim in self.game.make_turn()
+                  if anim.object is block]
+        self.assertIs(first[0], second[0])
+
+    def test_game_objects_have_no_instance_dict(self):
+        for game_object in (Block(), Monster(), Bonus(), Bomb(1, 5),
+                            ExplosionBlock(1), Player(GoRightController()),
+                            child_classes.CleverMonster(),
+                            child_classes.HighPowerBomb(1, 5),
+                            child_classes.ImmuneBuff(),
+                            Animation(Block(), Point(0, 0), Direction.Stand)):
+            self.assertFalse(hasattr(game_object, "__dict__"))
+
+    def test_subclasses_can_add_attributes(self):
+        class TaggedBlock(child_classes.DestroyableBlock):
+            def __init__(self):
+                super().__init__()
+                self.tag = "tagged"
+
+        block = TaggedBlock()
+        block.is_dead = True
+        block_copy = copy.deepcopy(block)
+        self.assertEqual("tagged", block_copy.tag)
+        self.assertTrue(block_copy.is_dead)
+        self.assertIsNone(block_copy.last_animation)
+
     def test_player_sets_controller(self):
         controller = GoRightController()
         player = Player(controller)
@@ -334,6 +1587,71 @@ class TestChildClasses(unittest.TestCase):
                              Point(CELL_SIZE*4 - 1, 0)
                          )])
 
+    def test_flow_field_follows_obstacle_mask(self):
+        class BombWalker(child_classes.CleverMonster):
+            obstacle_mask = BLOCK | BONUS
+
+        walker = BombWalker()
+        self.assertEqual((Block, Bonus), walker.object_types)
+        self.map.add_map_object(self.player, Point(0, 0))
+        self.map.add_map_object(Bomb(100, 2), Point(CELL_SIZE, 0))
+        self.assertEqual(1, walker.get_flow_field(self.map)
+                         .get_distance(Point(CELL_SIZE, 0)))
+        self.assertIsNone(child_classes.CleverMonster().get_flow_field(
+            self.map).get_distance(Point(CELL_SIZE, 0)))
+
+    def test_clever_monsters_share_flow_field(self):
+        self.map.add_map_object(self.player, Point(0, 0))
+        self.map.add_map_object(Block(), Point(CELL_SIZE, 0))
+        first_monster = child_classes.CleverMonster()
+        second_monster = child_classes.CleverMonster()
+        flow_field = first_monster.get_flow_field(self.map)
+        self.assertIs(flow_field, second_monster.get_flow_field(self.map))
+        self.assertEqual(0, flow_field.get_distance(Point(0, 0)))
+        self.assertIsNone(flow_field.get_distance(Point(CELL_SIZE, 0)))
+        self.assertEqual(4, flow_field.get_distance(Point(CELL_SIZE * 2, 0)))
+        self.assertIsNone(flow_field.get_distance(
+            Point(CELL_SIZE * child_classes.CleverMonster.VISION_RANGE, 0)))
+        self.assertEqual(Point(CELL_SIZE * 2, CELL_SIZE),
+                         flow_field.get_next_point(Point(CELL_SIZE * 3,
+                                                         CELL_SIZE)))
+        self.map.add_map_object(Block(), Point(0, CELL_SIZE))
+        self.assertIsNot(flow_field, first_monster.get_flow_field(self.map))
+
+    def test_clever_monster_sees_strictly_within_vision_range(self):
+        self.map.add_map_object(self.player, Point(0, 0))
+        vision_range = child_classes.CleverMonster.VISION_RANGE
+        for distance, direction in ((vision_range - 1, Direction.Left),
+                                    (vision_range, Direction.Stand)):
+            monster = child_classes.CleverMonster()
+            self.assertIs(direction, monster.move(
+                Point(CELL_SIZE * distance, 0), self.map).direction)
+
+    def test_flow_field_is_reused_until_layout_changes(self):
+        self.map.add_map_object(self.player, Point(0, 0))
+        self.player.set_controller(sim.IdleController())
+        monster = child_classes.CleverMonster()
+        self.map.add_map_object(Block(), Point(CELL_SIZE * 20, 0))
+        game = Game(self.map, self.player, incremental=True)
+        game.make_turn()
+        flow_field = monster.get_flow_field(game.map)
+        game.make_turn()
+        game.make_turn()
+        self.assertIs(flow_field, monster.get_flow_field(game.map))
+        game.map.add_map_object(Block(), Point(CELL_SIZE, 0))
+        self.assertIsNot(flow_field, monster.get_flow_field(game.map))
+
+    def test_flow_field_follows_player_cell(self):
+        self.map.add_map_object(self.player, Point(0, 0))
+        monster = child_classes.CleverMonster()
+        game = Game(self.map, self.player, incremental=True)
+        flow_field = monster.get_flow_field(game.map)
+        game.make_turn()
+        game.make_turn()
+        self.assertIsNot(flow_field, monster.get_flow_field(game.map))
+        self.assertEqual(0, monster.get_flow_field(game.map)
+                         .get_distance(Point(CELL_SIZE, 0)))
+
     def test_new_monsters_kill_player(self):
         self.map.add_map_object(self.player, Point(0, 0))
         self.map.add_map_object(child_classes.SimpleMonster(), Point(0, 0))